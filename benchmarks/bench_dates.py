@@ -0,0 +1,53 @@
+"""
+Compare the old date and month columns (datetime.fromtimestamp() and
+strftime() twice per record, in local time) with DateBuckets, for
+created_utc given as ints and as strings. Run from the repository root:
+
+    python -m benchmarks.bench_dates [records]
+
+Timestamps are in order, about a minute apart, like a busy subreddit's
+dump, so most records share a day with the one before.
+"""
+
+import sys
+import time
+from datetime import datetime
+
+from redditscripts.dates import DateBuckets
+
+
+def legacy_dates(timestamps):
+    columns = []
+    for created_utc in timestamps:
+        date = datetime.fromtimestamp(int(created_utc)).strftime('%Y-%m-%d')
+        month = datetime.fromtimestamp(int(created_utc)).strftime('%Y-%m')
+        columns.append((date, month))
+    return columns
+
+
+def bucket_dates(timestamps):
+    date_month = DateBuckets()
+    return [date_month(created_utc) for created_utc in timestamps]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    ints = [1300000000 + n * 61 for n in range(count)]
+    print("created_utc,records,legacy_ns_per_record,buckets_ns_per_record,speedup")
+    for kind, timestamps in (("int", ints), ("str", [str(created_utc) for created_utc in ints])):
+        start = time.perf_counter()
+        legacy = legacy_dates(timestamps)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        buckets = bucket_dates(timestamps)
+        buckets_time = time.perf_counter() - start
+
+        # the old columns are in local time, so only compare them in UTC
+        if time.timezone == 0 and not time.daylight:
+            assert legacy == buckets
+        print("%s,%d,%.0f,%.0f,%.1fx" % (kind, count, legacy_time / count * 1e9, buckets_time / count * 1e9, legacy_time / buckets_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Time the submission pass filter with each JSON backend, with and without
+the raw-bytes prefilter. Run from the repository root:
+
+    python -m benchmarks.bench_decoding [records]
+
+Records carry the ~60 fields of a real Pushshift submission, and roughly
+1 in 20 contains a keyword.
+"""
+
+import json
+import random
+import re
+import sys
+import time
+
+from redditscripts.decoding import BACKENDS, SUBMISSION_FIELDS, make_decoder
+from redditscripts.matching import KeywordMatcher, RawPrefilter
+
+KEYWORDS = [" aesthetic closure", " goldilock", " explant", " flat chest", " go flat", " going flat", " stay flat", " flat closure", " remove the implant", " removed my implant"]
+
+cleanup_pattern = re.compile(r'[\W_]+')
+
+
+def make_lines(count, rng):
+    vocabulary = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(2, 9))) for _ in range(5000)]
+    lines = []
+    for n in range(count):
+        record = {
+            "subreddit": "breastcancer",
+            "title": " ".join(rng.choices(vocabulary, k=10)),
+            "selftext": " ".join(rng.choices(vocabulary, k=150)),
+            "author": rng.choice(vocabulary),
+            "score": rng.randint(0, 500),
+            "url": "https://www.reddit.com/r/breastcancer/comments/%x/" % n,
+            "id": "%x" % n,
+            "permalink": "/r/breastcancer/comments/%x/" % n,
+            "created_utc": 1500000000 + n * 60,
+        }
+        if rng.random() < 0.05:
+            record["selftext"] += rng.choice(KEYWORDS)
+        # the fields the scripts never read
+        for extra in range(50):
+            record["extra_%d" % extra] = rng.choice([None, False, 0, "", rng.choice(vocabulary), {"a": [1, 2]}])
+        lines.append(json.dumps(record).encode("UTF-8"))
+    return lines
+
+
+def run(lines, decode, matcher, prefilter):
+    hits = 0
+    for line in lines:
+        if prefilter is not None and not prefilter.may_match(line):
+            continue
+        j = decode(line)
+        title = " "+cleanup_pattern.sub(' ', j["title"].lower())+" "
+        selftext = " "+cleanup_pattern.sub(' ', j["selftext"].lower())+" "
+        if matcher.matches(title, selftext):
+            hits += 1
+    return hits
+
+
+def main():
+    records_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    lines = make_lines(records_count, random.Random(0))
+    matcher = KeywordMatcher(KEYWORDS)
+    print("backend,prefilter,lines_per_s,speedup,hits")
+    baseline = None
+    expected_hits = None
+    # stdlib json first, as the baseline
+    for backend in reversed(BACKENDS):
+        try:
+            decode = make_decoder(SUBMISSION_FIELDS, backend)
+        except ImportError:
+            print("%s,skipped (not installed)" % backend)
+            continue
+        for prefilter in (None, RawPrefilter(KEYWORDS)):
+            start = time.perf_counter()
+            hits = run(lines, decode, matcher, prefilter)
+            elapsed = time.perf_counter() - start
+            if expected_hits is None:
+                expected_hits = hits
+            assert hits == expected_hits
+            if backend == "json" and prefilter is None:
+                baseline = elapsed
+            print("%s,%s,%.0f,%s,%d" % (backend, "yes" if prefilter else "no", records_count / elapsed, "%.1fx" % (baseline / elapsed) if baseline else "", hits))
+
+
+if __name__ == "__main__":
+    main()
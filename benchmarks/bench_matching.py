@@ -0,0 +1,82 @@
+"""
+Compare the old per-keyword `in` scan with KeywordMatcher as the keyword
+list grows. Run from the repository root:
+
+    python -m benchmarks.bench_matching [records]
+
+Texts are random words with roughly 1 in 20 records containing a keyword,
+which is about what a large subreddit dump looks like.
+"""
+
+import random
+import sys
+import time
+
+from redditscripts.matching import KeywordMatcher
+
+KEYWORD_COUNTS = [30, 100, 500, 1000, 5000]
+
+
+def make_vocabulary(size, rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choices(letters, k=rng.randint(2, 9))) for _ in range(size)]
+
+
+def make_keywords(count, vocabulary, rng):
+    keywords = set()
+    while len(keywords) < count:
+        keywords.add(" " + " ".join(rng.choices(vocabulary, k=rng.randint(2, 3))) + " ")
+    return sorted(keywords)
+
+
+def make_records(count, vocabulary, keywords, rng):
+    records = []
+    for _ in range(count):
+        title = " " + " ".join(rng.choices(vocabulary, k=10)) + " "
+        selftext = " " + " ".join(rng.choices(vocabulary, k=120)) + " "
+        if rng.random() < 0.05:
+            selftext += rng.choice(keywords).lstrip()
+        records.append((title, selftext))
+    return records
+
+
+def legacy_scan(records, keywords):
+    hits = 0
+    for title, selftext in records:
+        if any([(keyword in selftext or keyword in title) for keyword in keywords]):
+            hits += 1
+    return hits
+
+
+def matcher_scan(records, matcher):
+    hits = 0
+    for title, selftext in records:
+        if matcher.matches(title, selftext):
+            hits += 1
+    return hits
+
+
+def main():
+    records_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(20000, rng)
+    print("keywords,records,legacy_s,matcher_s,speedup,hits")
+    for keyword_count in KEYWORD_COUNTS:
+        keywords = make_keywords(keyword_count, vocabulary, rng)
+        records = make_records(records_count, vocabulary, keywords, rng)
+
+        start = time.perf_counter()
+        legacy_hits = legacy_scan(records, keywords)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        matcher_hits = matcher_scan(records, matcher)
+        matcher_time = time.perf_counter() - start
+
+        assert legacy_hits == matcher_hits
+        print("%d,%d,%.3f,%.3f,%.1fx,%d" % (keyword_count, records_count, legacy_time, matcher_time, legacy_time / matcher_time, matcher_hits))
+
+
+if __name__ == "__main__":
+    main()
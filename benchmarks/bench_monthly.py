@@ -0,0 +1,51 @@
+"""
+Time the monthly n-gram pass (reddit2csv3.py) with different numbers of
+worker processes, on a synthetic corpus filtered the way reddit2csv.py
+does it. Run from the repository root:
+
+    python -m benchmarks.bench_monthly [records] [workers...]
+
+Defaults to 200,000 records and 1, 2 and 4 workers, and to every
+keyword matching (hit rate 1) so that all of the corpus reaches the
+monthly pass. Speedup is relative to the first worker count given, and
+can't be more than the number of cores.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from benchmarks.corpus import KEYWORDS, generate
+from redditscripts.filtering import Filter
+from redditscripts.instrument import RunReport
+from redditscripts.monthly import CUSTOM_STOPWORDS, monthly_ngrams
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    worker_counts = [int(workers) for workers in sys.argv[2:]] or [1, 2, 4]
+    directory = tempfile.mkdtemp(prefix="bench_monthly_")
+    output_dir = os.path.join(directory, "output")
+    try:
+        generate(directory, records, hit_rate=1)
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            Filter(KEYWORDS, output_dir=output_dir, report=RunReport("filter")).run(["breastcancer"], input_dir=directory)
+        print("records,workers,months,seconds,speedup,cpus")
+        first = None
+        for workers in worker_counts:
+            report = RunReport("monthly")
+            start = time.perf_counter()
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                monthly_ngrams(["breastcancer"], KEYWORDS + CUSTOM_STOPWORDS, output_dir=output_dir, report=report, workers=workers)
+            elapsed = time.perf_counter() - start
+            first = first or elapsed
+            print("%d,%d,%d,%.3f,%.2fx,%d" % (records, workers, report.phases["months"].amount, elapsed, first / elapsed, os.cpu_count()))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare the old monthly n-gram counting (a list of every n-gram tuple fed
+to a FreqDist, once per order) with NgramCounter in exact and sketch
+mode, for time and peak memory. Run from the repository root:
+
+    python -m benchmarks.bench_ngrams [words]
+
+Words follow a Zipf-like distribution over a 50,000-word vocabulary, in
+documents of 5 to 300 words, as one busy month.
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+from redditscripts.ngrams import NgramCounter, Vocabulary
+
+
+def make_documents(words_count, rng):
+    vocabulary = ["w%d" % n for n in range(50000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    words = rng.choices(vocabulary, weights=weights, k=words_count)
+    documents = []
+    position = 0
+    while position < len(words):
+        length = rng.randint(5, 300)
+        documents.append(words[position:position + length])
+        position += length
+    return documents
+
+
+def legacy_counts(documents):
+    words = []
+    for document in documents:
+        words.extend(document)
+    # what nltk.FreqDist(list(nltk.bigrams(words))) does
+    results = []
+    for n in (1, 2, 3):
+        counts = Counter(list(zip(*[words[start:] for start in range(n)])))
+        results.append([gram for gram, count in counts.most_common(20)])
+    return results
+
+
+def engine_counts(documents, sketch_size):
+    counts = NgramCounter(Vocabulary(), (1, 2, 3), sketch_size)
+    for document in documents:
+        counts.add(document)
+    return [[gram for gram, count in counts.most_common(n, 20)] for n in (1, 2, 3)]
+
+
+def measure(function, *args):
+    # time and memory are measured in separate runs, as tracing
+    # allocations slows everything down
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    words_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    documents = make_documents(words_count, random.Random(0))
+    print("mode,words,seconds,peak_mb,top20_matches_exact")
+    exact = None
+    for mode, function, args in [
+            ("legacy", legacy_counts, (documents,)),
+            ("exact", engine_counts, (documents, None)),
+            ("sketch_10000", engine_counts, (documents, 10000)),
+            ("sketch_1000", engine_counts, (documents, 1000))]:
+        result, elapsed, peak = measure(function, *args)
+        if exact is None:
+            exact = result
+        matches = "/".join(str(len(set(a) & set(b))) for a, b in zip(result, exact))
+        print("%s,%d,%.2f,%.1f,%s" % (mode, words_count, elapsed, peak / 2 ** 20, matches))
+
+
+if __name__ == "__main__":
+    main()
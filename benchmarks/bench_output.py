@@ -0,0 +1,78 @@
+"""
+Compare the old way of writing the filter's output (csv.DictWriter one
+record at a time, then json.dump() of the dict of records) with the
+tuple-row writers of redditscripts.output, with and without the
+background writer thread. Run from the repository root:
+
+    python -m benchmarks.bench_output [records]
+
+The records are comment-shaped, with every comment column. Times are for
+writing the CSV and JSON files; the JSON Lines writer is timed on its
+own.
+"""
+
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from operator import itemgetter
+
+from redditscripts.filtering import COMMENT_COLUMNS
+from redditscripts.output import WriterThread, open_rows, write_rows
+
+
+def make_comments(count):
+    comments = {}
+    for number in range(count):
+        comment_id = "t1_%x" % number
+        comments[comment_id] = {
+            "subreddit": "breastcancer", "type": "comment", "author": "u%d" % (number % 5000), "score": number % 50,
+            "body": "a comment about going flat " * (1 + number % 12), "id": comment_id, "parent_id": "t3_%x" % (number // 7),
+            "submission_id": "t3_%x" % (number // 7), "submission_title": "a title", "permalink": "https://www.reddit.com/r/x/%d/" % number,
+            "created_utc": 1300000000 + number * 61, "date": "2011-03-13", "month": "2011-03",
+        }
+    return comments
+
+
+def legacy(directory, comments):
+    with open(os.path.join(directory, "comments.csv"), "w", encoding="UTF-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=COMMENT_COLUMNS)
+        writer.writeheader()
+        for comment in comments.values():
+            writer.writerow(comment)
+    with open(os.path.join(directory, "comments.json"), "w", encoding="UTF-8") as jsonfile:
+        json.dump(comments, jsonfile)
+
+
+def rows(directory, comments, kinds, thread=None):
+    writers = [open_rows(kind, os.path.join(directory, "comments"), COMMENT_COLUMNS, thread) for kind in kinds]
+    write_rows(writers, map(itemgetter(*COMMENT_COLUMNS), comments.values()))
+    for writer in writers:
+        writer.close()
+    if thread is not None:
+        thread.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    comments = make_comments(count)
+    directory = tempfile.mkdtemp(prefix="bench_output_")
+    print("writer,records,seconds,records_per_s")
+    try:
+        for name, function in (("DictWriter + json.dump", lambda: legacy(directory, comments)),
+                               ("rows", lambda: rows(directory, comments, ["csv", "json"])),
+                               ("rows + thread", lambda: rows(directory, comments, ["csv", "json"], WriterThread())),
+                               ("jsonl", lambda: rows(directory, comments, ["jsonl"]))):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            print("%s,%d,%.3f,%.0f" % (name, count, elapsed, count / elapsed))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
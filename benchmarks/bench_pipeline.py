@@ -0,0 +1,149 @@
+"""
+Time the scripts end to end on synthetic corpora of a given number of
+records (submissions and comments together). reddit2csv2.py is left out,
+as it only differs from reddit2csv.py in its keywords and columns. Run
+from the repository root:
+
+    python -m benchmarks.bench_pipeline [sizes] [--dir DIR] [--save FILE] [--compare FILE]
+
+Sizes are record counts such as 10k, 1M or 10M (default 10k). Each size
+gets a corpus from benchmarks.corpus with the keywords of reddit2csv.py,
+and the scripts are run on it as they are, in a fresh working directory.
+The timings are the phases from each script's JSON report: the
+submission pass, the comment pass and writing for reddit2csv.py, the
+monthly n-gram pass of reddit2csv3.py and the frequency-over-time pass
+of reddit2csv4.py.
+
+--save writes the results to a JSON file, and --compare prints how much
+faster or slower each phase is than in a saved file, to check a change
+for regressions. With --dir the corpora are kept there and reused by
+later runs (10M records take about 6 GB); otherwise they're deleted.
+
+The analysis scripts need nltk's stopwords corpus; they are reported as
+failed without it.
+"""
+
+import argparse
+import ast
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPTS = ["reddit2csv", "reddit2csv3", "reddit2csv4"]
+
+OUTPUT_DIRS = ["output", "output/monthly/freq", "output/monthly/bigrams", "output/monthly/trigrams", "output/freq-over-time"]
+
+# slower than this (relative to --compare) is flagged
+REGRESSION = 1.1
+
+
+def parse_size(size):
+    multipliers = {"k": 1000, "m": 1000000}
+    if size[-1].lower() in multipliers:
+        return int(float(size[:-1]) * multipliers[size[-1].lower()])
+    return int(size)
+
+
+def script_constant(script, name):
+    with open(os.path.join(REPOSITORY, script + ".py"), encoding="UTF-8") as infile:
+        tree = ast.parse(infile.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == name for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise KeyError(name)
+
+
+def make_corpus(directory, records):
+    reddit = script_constant("reddit2csv", "REDDITS")[0]
+    if not os.path.exists(os.path.join(directory, reddit + "_comments")):
+        start = time.perf_counter()
+        generate(directory, records, reddit, keywords=script_constant("reddit2csv", "KEYWORDS"))
+        print("# generated %d records in %.0fs" % (records, time.perf_counter() - start), file=sys.stderr)
+
+
+def run_scripts(directory):
+    """
+    Run each script in directory and return {script: report}, or
+    {script: {"error": ...}} for the ones that failed.
+    """
+    for output_dir in OUTPUT_DIRS:
+        os.makedirs(os.path.join(directory, output_dir), exist_ok=True)
+    environment = dict(os.environ, PYTHONPATH=REPOSITORY + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    reports = {}
+    for script in SCRIPTS:
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, os.path.join(REPOSITORY, script + ".py")], cwd=directory, env=environment,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - start
+        if process.returncode:
+            errors = process.stderr.strip().splitlines() or ["exit status %d" % process.returncode]
+            reports[script] = {"error": errors[-1]}
+            continue
+        with open(os.path.join(directory, "output", script + "_report.json"), encoding="UTF-8") as infile:
+            reports[script] = json.load(infile)
+        reports[script]["wall_seconds"] = round(elapsed, 3)
+    return reports
+
+
+def rows(size, reports):
+    for script, report in reports.items():
+        if "error" in report:
+            yield (size, script, "failed: " + report["error"], None, None, None)
+            continue
+        for phase, summary in report["phases"].items():
+            yield (size, script, phase, summary["seconds"], summary["lines_per_s"], summary.get("bytes_per_s"))
+        yield (size, script, "total", report["wall_seconds"], None, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the scripts on synthetic corpora.")
+    parser.add_argument("sizes", nargs="*", default=["10k"])
+    parser.add_argument("--dir", help="keep the corpora here and reuse them")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare with results saved by --save")
+    args = parser.parse_args()
+    previous = {}
+    if args.compare:
+        with open(args.compare, encoding="UTF-8") as infile:
+            previous = json.load(infile)
+
+    results = {}
+    print("records,script,phase,seconds,lines_per_s,mb_per_s" + (",previous_seconds,change" if previous else ""))
+    for size in args.sizes:
+        records = parse_size(size)
+        directory = os.path.join(args.dir, str(records)) if args.dir else tempfile.mkdtemp(prefix="bench_pipeline_")
+        try:
+            make_corpus(directory, records)
+            reports = run_scripts(directory)
+        finally:
+            if args.dir:
+                shutil.rmtree(os.path.join(directory, "output"), ignore_errors=True)
+            else:
+                shutil.rmtree(directory)
+        results[str(records)] = reports
+        for records_count, script, phase, seconds, lines_per_s, bytes_per_s in rows(records, reports):
+            line = "%d,%s,%s,%s,%s,%s" % (records_count, script, phase, "" if seconds is None else "%.3f" % seconds,
+                                         "" if not lines_per_s else "%.0f" % lines_per_s, "" if not bytes_per_s else "%.1f" % (bytes_per_s / 1e6))
+            before = previous.get(str(records), {}).get(script, {})
+            if seconds is not None and before and "error" not in before:
+                old = before["wall_seconds"] if phase == "total" else before["phases"].get(phase, {}).get("seconds")
+                if old:
+                    ratio = seconds / old
+                    line += ",%.3f,%+.0f%%%s" % (old, (ratio - 1) * 100, " slower" if ratio > REGRESSION else "")
+            print(line, flush=True)
+
+    if args.save:
+        with open(args.save, "w", encoding="UTF-8") as outfile:
+            json.dump(results, outfile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
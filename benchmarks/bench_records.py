@@ -0,0 +1,121 @@
+"""
+Compare the memory held by the filter's matched records, as the dicts
+it used to build and as the Submission and Comment named tuples of
+redditscripts.records, measured with tracemalloc. Run from the
+repository root:
+
+    python -m benchmarks.bench_records [records] [comments_per_submission]
+
+Defaults to 200,000 records with 20 comments per submission, all of them
+matching, so that nearly all of the memory is the comment pass's: every
+comment kept by id and by parent, as the batch (non-streaming) filter
+does. The decoded strings are counted too, as they're what the records
+hold on to.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+from benchmarks.corpus import KEYWORDS, generate
+from redditscripts.filtering import Filter
+from redditscripts.records import Submission, intern
+
+
+def legacy(submissions_filename, comments_filename, filter):
+    submissions = {}
+    with open(submissions_filename, encoding="UTF-8") as infile:
+        for line in infile:
+            j = json.loads(line)
+            submission = {}
+            submission["subreddit"] = j["subreddit"]
+            submission["type"] = "submission"
+            submission["title"] = j["title"]
+            submission["author"] = j["author"]
+            submission["score"] = j["score"]
+            submission["selftext"] = j["selftext"]
+            submission["url"] = j["url"]
+            submission["id"] = "t3_"+j["id"]
+            submission["permalink"] = "https://www.reddit.com"+j["permalink"]
+            submission["created_utc"] = j["created_utc"]
+            submission["date"], submission["month"] = filter.date_month(j["created_utc"])
+            submission["matched_keywords"] = ""
+            submissions[submission["id"]] = submission
+    comments = {}
+    comments_by_thread = defaultdict(list)
+    with open(comments_filename, encoding="UTF-8") as infile:
+        for line in infile:
+            j = json.loads(line)
+            comment = {}
+            comment["subreddit"] = j["subreddit"]
+            comment["type"] = "comment"
+            comment["author"] = j["author"]
+            comment["score"] = j["score"]
+            comment["body"] = j["body"]
+            comment["id"] = "t1_"+j["id"]
+            comment["parent_id"] = j["parent_id"]
+            comment["submission_id"] = j["link_id"]
+            comment["submission_title"] = submissions[j["link_id"]]["title"]
+            if "permalink" in j:
+                comment["permalink"] = "https://www.reddit.com"+j["permalink"]
+            else:
+                comment["permalink"] = "NONE"
+            comment["created_utc"] = j["created_utc"]
+            comment["date"], comment["month"] = filter.date_month(j["created_utc"])
+            comments[comment["id"]] = comment
+            comments_by_thread[comment["parent_id"]].append(comment)
+    return submissions, comments, comments_by_thread
+
+
+def records(submissions_filename, comments_filename, filter):
+    submissions = {}
+    with open(submissions_filename, encoding="UTF-8") as infile:
+        for line in infile:
+            j = json.loads(line)
+            date, month = filter.date_month(j["created_utc"])
+            submission = Submission(intern(j["subreddit"]), j["title"], intern(j["author"]), j["score"], j["selftext"], j["url"],
+                                    "t3_"+j["id"], j["permalink"], j["created_utc"], date, month, "")
+            submissions[submission.id] = submission
+            filter.titles[submission.id] = submission.title
+    comments = {}
+    comments_by_thread = defaultdict(list)
+    with open(comments_filename, encoding="UTF-8") as infile:
+        for line in infile:
+            j = json.loads(line)
+            comment = filter.make_comment(j, j["link_id"])
+            comments[comment.id] = comment
+            comments_by_thread[comment.parent_id].append(comment)
+    return submissions, comments, comments_by_thread
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    comments_per_submission = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    directory = tempfile.mkdtemp(prefix="bench_records_")
+    try:
+        generate(directory, count, hit_rate=1, comments_per_submission=comments_per_submission)
+        submissions_filename = os.path.join(directory, "breastcancer_submissions")
+        comments_filename = os.path.join(directory, "breastcancer_comments")
+        print("records,count,seconds,held_mb,peak_mb,bytes_per_record")
+        for name, function in (("dicts", legacy), ("named tuples", records)):
+            filter = Filter(KEYWORDS, output_dir=directory)
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = function(submissions_filename, comments_filename, filter)
+            elapsed = time.perf_counter() - start
+            held, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            kept = len(result[0]) + len(result[1])
+            print("%s,%d,%.3f,%.1f,%.1f,%.0f" % (name, kept, elapsed, held / 2**20, peak / 2**20, held / kept))
+            del result, filter
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
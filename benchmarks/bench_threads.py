@@ -0,0 +1,98 @@
+"""
+Compare the old comment pass thread lookup (list membership plus
+get_submission() walking the parent chain) with ThreadIndex, as the
+number of comments and the depth of threads grow. Run from the
+repository root:
+
+    python -m benchmarks.bench_threads [submissions]
+
+Each submission gets one reply chain of the given depth, so every comment
+belongs to a matched thread and the deepest comments have the longest
+parent chains to walk.
+"""
+
+import sys
+import time
+
+from redditscripts.ids import ThreadIndex
+
+THREAD_DEPTHS = [1, 5, 20, 50]
+
+
+def base36(number):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    result = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        result = digits[remainder] + result
+        if not number:
+            return result
+
+
+def make_corpus(submissions_count, depth):
+    """
+    Submission ids and (comment_id, parent_id) pairs in chronological
+    order: each round adds one more level to every thread.
+    """
+    submission_ids = ["t3_" + base36(n) for n in range(submissions_count)]
+    parents = list(submission_ids)
+    comments = []
+    next_id = 0
+    for level in range(depth):
+        for thread, parent_id in enumerate(parents):
+            comment_id = "t1_" + base36(next_id)
+            next_id += 1
+            comments.append((comment_id, parent_id))
+            parents[thread] = comment_id
+    return submission_ids, comments
+
+
+def legacy_pass(submission_ids, comments):
+    def get_submission(j, comments):
+        parent_ids = []
+        while 1:
+            if j["parent_id"][0:3] == "t3_":
+                return j["parent_id"]
+            parent_ids.append(j["parent_id"])
+            if j["parent_id"] in comments.keys():
+                j = comments[j["parent_id"]]
+            else:
+                return None
+
+    seen = {}
+    for comment_id, parent_id in comments:
+        j = {"id": comment_id, "parent_id": parent_id}
+        if parent_id in submission_ids or parent_id in seen.keys():
+            j["submission_id"] = get_submission(j, seen)
+            j["submission_title"] = get_submission(j, seen)
+            seen[comment_id] = j
+    return len(seen)
+
+
+def index_pass(submission_ids, comments):
+    thread_index = ThreadIndex(submission_ids)
+    for comment_id, parent_id in comments:
+        thread_index.add_comment(comment_id, parent_id)
+    return len(thread_index)
+
+
+def main():
+    submissions_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print("depth,comments,legacy_comments_per_s,index_comments_per_s,speedup")
+    for depth in THREAD_DEPTHS:
+        submission_ids, comments = make_corpus(submissions_count, depth)
+
+        start = time.perf_counter()
+        legacy_count = legacy_pass(submission_ids, comments)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index_count = index_pass(submission_ids, comments)
+        index_time = time.perf_counter() - start
+
+        assert legacy_count == index_count == len(comments)
+        print("%d,%d,%.0f,%.0f,%.1fx" % (depth, len(comments), len(comments) / legacy_time, len(comments) / index_time, legacy_time / index_time))
+
+
+if __name__ == "__main__":
+    main()
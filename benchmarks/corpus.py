@@ -0,0 +1,215 @@
+"""
+Synthetic Pushshift-style dumps to benchmark and try out the scripts on.
+
+generate() writes a <reddit>_submissions and a <reddit>_comments jsonl
+file shaped like the subreddit dumps:
+
+  * records are in chronological order, and every reply comes after its
+    parent, which the comment pass relies on,
+  * comments form threads up to max_depth replies deep,
+  * a hit_rate share of submissions mention one of the keywords,
+  * records carry the fields the scripts read plus the ones they don't,
+    so decoding costs about what it does on the real dumps, and
+  * records before era_split look like the older dumps: created_utc is a
+    string, comments have no permalink, and the newer fields are missing.
+
+The same arguments (and seed) always give the same files. Run from the
+repository root, e.g. to make the files SAMPLE = True reads:
+
+    python -m benchmarks.corpus . --records 20000 --sample
+"""
+
+import argparse
+import heapq
+import json
+import os
+import random
+from datetime import datetime, timezone
+
+KEYWORDS = [" aesthetic closure", " goldilock", " explant", " flat chest", " go flat", " going flat", " stay flat", " flat closure", " remove the implant", " removed my implant"]
+
+VOCABULARY_SIZE = 20000
+
+
+def _timestamp(year, month=1, day=1):
+    return int(datetime(year, month, day, tzinfo=timezone.utc).timestamp())
+
+
+def base36(number):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    result = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        result = digits[remainder] + result
+        if not number:
+            return result
+
+
+class _Text:
+    # Zipf-distributed words, so n-gram counts look like real text
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.words = ["w%d" % n for n in range(VOCABULARY_SIZE)]
+        self.cum_weights = []
+        total = 0.0
+        for rank in range(VOCABULARY_SIZE):
+            total += 1 / (rank + 1)
+            self.cum_weights.append(total)
+
+    def __call__(self, low, high):
+        words = self.rng.choices(self.words, cum_weights=self.cum_weights, k=self.rng.randint(low, high))
+        return " ".join(words)
+
+
+def _submission(rng, text, reddit, number, created_utc, old, keyword):
+    submission_id = base36(number)
+    title = text(3, 15)
+    selftext = text(0, 200)
+    if keyword:
+        selftext += " " + keyword.strip() + " " + text(0, 20)
+    record = {
+        "archived": False,
+        "author": "[deleted]" if rng.random() < 0.05 else "u%d" % rng.randrange(50000),
+        "created_utc": str(created_utc) if old else created_utc,
+        "domain": "self." + reddit,
+        "id": submission_id,
+        "is_self": True,
+        "num_comments": 0,
+        "over_18": False,
+        "permalink": "/r/%s/comments/%s/" % (reddit, submission_id),
+        "retrieved_on": created_utc + 86400 * 30,
+        "score": rng.randint(0, 500),
+        "selftext": selftext,
+        "stickied": False,
+        "subreddit": reddit,
+        "subreddit_id": "t5_2qh1s",
+        "title": title,
+        "url": "https://www.reddit.com/r/%s/comments/%s/" % (reddit, submission_id),
+    }
+    if not old:
+        record.update({
+            "all_awardings": [],
+            "author_flair_richtext": [],
+            "gildings": {},
+            "is_original_content": False,
+            "link_flair_richtext": [],
+            "media_embed": {},
+            "total_awards_received": 0,
+            "upvote_ratio": round(rng.random(), 2),
+        })
+    return record
+
+
+def _comment(rng, text, reddit, comment_id, parent_id, link_id, created_utc, old):
+    record = {
+        "author": "[deleted]" if rng.random() < 0.05 else "u%d" % rng.randrange(50000),
+        "body": "[removed]" if rng.random() < 0.02 else text(1, 80),
+        "controversiality": 0,
+        "created_utc": str(created_utc) if old else created_utc,
+        "edited": False,
+        "gilded": 0,
+        "id": comment_id,
+        "link_id": link_id,
+        "parent_id": parent_id,
+        "retrieved_on": created_utc + 86400 * 30,
+        "score": rng.randint(-5, 200),
+        "stickied": False,
+        "subreddit": reddit,
+        "subreddit_id": "t5_2qh1s",
+    }
+    if not old:
+        record.update({
+            "all_awardings": [],
+            "author_flair_richtext": [],
+            "gildings": {},
+            "is_submitter": False,
+            "permalink": "/r/%s/comments/%s/_/%s/" % (reddit, link_id[3:], comment_id),
+            "total_awards_received": 0,
+        })
+    return record
+
+
+def generate(directory, records, reddit="breastcancer", keywords=KEYWORDS, hit_rate=0.05,
+             comments_per_submission=5, max_depth=8, start=_timestamp(2011), end=_timestamp(2023),
+             era_split=_timestamp(2017), seed=0, suffix=""):
+    """
+    Write about records submissions and comments, comments_per_submission
+    comments to one submission on average, posted between start and end.
+    Returns the submissions and comments filenames.
+    """
+    rng = random.Random(seed)
+    text = _Text(rng)
+    submissions_count = max(1, round(records / (comments_per_submission + 1)))
+    comments_count = records - submissions_count
+    interval = (end - start) / submissions_count
+    # replies come within a week of their parent, spread out enough that
+    # threads overlap as they do on a busy subreddit
+    reply_delay = 7 * 86400
+
+    os.makedirs(directory, exist_ok=True)
+    submissions_filename = os.path.join(directory, reddit + "_submissions" + suffix)
+    comments_filename = os.path.join(directory, reddit + "_comments" + suffix)
+    # comments not written yet, as (created_utc, order, comment_id,
+    # parent_id, link_id, depth); order keeps parents ahead of replies
+    # posted in the same second
+    pending = []
+    order = 0
+    comment_number = 0
+    with open(submissions_filename, "w", encoding="UTF-8") as submissions_file, \
+            open(comments_filename, "w", encoding="UTF-8") as comments_file:
+
+        def write_comments_until(until):
+            nonlocal order, comment_number
+            while pending and pending[0][0] < until:
+                created_utc, _, comment_id, parent_id, link_id, depth = heapq.heappop(pending)
+                record = _comment(rng, text, reddit, comment_id, parent_id, link_id, created_utc, created_utc < era_split)
+                comments_file.write(json.dumps(record) + "\n")
+                # a comment may get one reply, scheduled as it's written,
+                # so threads grow as chains of up to max_depth comments
+                if depth < max_depth and comment_number < comments_count and rng.random() < 0.5:
+                    reply_id = base36(comment_number)
+                    comment_number += 1
+                    order += 1
+                    heapq.heappush(pending, (created_utc + rng.randint(1, reply_delay), order, reply_id, "t1_" + comment_id, link_id, depth + 1))
+
+        for number in range(submissions_count):
+            created_utc = start + int(number * interval)
+            write_comments_until(created_utc)
+            keyword = rng.choice(keywords) if rng.random() < hit_rate else None
+            record = _submission(rng, text, reddit, number, created_utc, created_utc < era_split, keyword)
+            submissions_file.write(json.dumps(record) + "\n")
+            link_id = "t3_" + record["id"]
+            # each top-level comment gets a chain of about one reply, on
+            # average, so this gives comments_per_submission in all
+            for _ in range(rng.randint(0, round(comments_per_submission))):
+                if comment_number >= comments_count:
+                    break
+                comment_id = base36(comment_number)
+                comment_number += 1
+                order += 1
+                heapq.heappush(pending, (created_utc + rng.randint(1, reply_delay), order, comment_id, link_id, link_id, 1))
+        write_comments_until(float("inf"))
+    return submissions_filename, comments_filename
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic Pushshift-style submissions and comments dumps.")
+    parser.add_argument("directory")
+    parser.add_argument("--records", type=int, default=10000, help="submissions and comments in all")
+    parser.add_argument("--reddit", default="breastcancer")
+    parser.add_argument("--hit-rate", type=float, default=0.05, help="share of submissions mentioning a keyword")
+    parser.add_argument("--comments-per-submission", type=float, default=5)
+    parser.add_argument("--max-depth", type=int, default=8, help="deepest reply chain")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample", action="store_true", help="name the files <reddit>_submissions_sample and so on")
+    args = parser.parse_args()
+    filenames = generate(args.directory, args.records, args.reddit, hit_rate=args.hit_rate,
+                         comments_per_submission=args.comments_per_submission, max_depth=args.max_depth,
+                         seed=args.seed, suffix="_sample" if args.sample else "")
+    for filename in filenames:
+        print(filename, os.path.getsize(filename))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,16 +10,62 @@ Finds and outputs matching submissions and all comments belonging
 to matching submissions, ignores matching comments to non-matching
 submissions. Most useful for structured analysis when the keywords
 do a good job of identifying relevant submissions.
+
+The work is done by redditscripts.filtering; this script only holds the
+settings. `reddit2csv filter` runs the same with them given as options.
 """
 
 REDDITS = ["breastcancer"]
 KEYWORDS = [" aesthetic closure", " goldilock", " explant", " flat chest", " aesthetic flat", " be flat", " being flat", " is flat", " are flat", " i am flat", " i m flat", " am flat", " was flat", " go flat", " gone flat"," going flat", " went flat", " stay flat", " staying flat", " stayed flat", " flat ambassador", " flat closure", " flatties", " years flat", " year flat", " remove the implant"," removed the implant", " removing the implant", " remove my implant", " removed my implant", " removing my implant", " post-explant"]
 
-SUBMISSION_COLUMNS = ["subreddit","type","title","author","score","selftext","url","id","permalink","created_utc","date", "month"]
+SUBMISSION_COLUMNS = ["subreddit","type","title","author","score","selftext","url","id","permalink","created_utc","date", "month", "matched_keywords"]
 COMMENT_COLUMNS = ["subreddit","type","author","score","body","id","parent_id","submission_id","submission_title","permalink","created_utc","date",]
 
 SAMPLE = False
 
+# Write matched comments as they are read instead of holding them all in
+# memory, for subreddits too large for the default comment pass.
+# GROUP_COMMENTS_BY_THREAD keeps the default CSV row order (grouped by
+# parent) using an on-disk sort; turn it off to write rows in
+# chronological order.
+STREAM_COMMENTS = False
+GROUP_COMMENTS_BY_THREAD = True
+
+# Set these to scan one dump covering many subreddits (e.g. a monthly
+# RS_/RC_ dump) instead of a pair of files per subreddit. Every reddit in
+# REDDITS is filtered in the same pass, by each record's subreddit field.
+COMBINED_SUBMISSIONS = None
+COMBINED_COMMENTS = None
+
+# The analysis scripts read the matched records from an SQLite store
+# (output/<reddit>.sqlite). The JSON files are only needed by other tools.
+WRITE_JSON = True
+
+# Also write the matched records as JSON Lines (.jsonl, one record per
+# line) and as Parquet (.parquet, needs the pyarrow package).
+WRITE_JSON_LINES = False
+WRITE_PARQUET = False
+
+# Number of processes used to parse and filter the jsonl files. Output is
+# the same as with a single process, rows just come back sooner.
+WORKERS = 1
+
+# JSON library used to decode the dumps: "msgspec", "orjson" or "json".
+# None uses the fastest one installed.
+JSON_BACKEND = None
+
+# Skip submission lines that can't contain any keyword before parsing them.
+PREFILTER = True
+
+# Hours east of UTC for the date and month columns. 0 gives UTC dates.
+UTC_OFFSET = 0
+
+# Only read what's new since the last incremental run: lines appended to
+# the dumps, and (for keywords added to KEYWORDS) the lines read before,
+# with just the new keywords. The first incremental run is a full scan.
+# The CSV and JSON files are rewritten from output/<reddit>.sqlite.
+INCREMENTAL = False
+
 # Reddit API notes
 # 'score' is the total score ('ups' - 'downs') of a post. 'ups' and
 #     downs' are deprecated - 'ups' is always the same as 'score' and
@@ -45,99 +91,17 @@ SAMPLE = False
 
 
 
-import json
-import csv
-from datetime import datetime 
-import re, string
-from collections import defaultdict
-
-def get_submission(j, comments):
-    parent_ids = []
-    while 1:
-        if j["parent_id"][0:3] == "t3_":
-            return j["parent_id"]
-        parent_ids.append(j["parent_id"])
-        if j["parent_id"] in comments.keys():
-            j = comments[j["parent_id"]]
-        else:
-            return None
-
-cleanup_pattern = re.compile(r'[\W_]+')
-submission_ids = {}
-for reddit in REDDITS:
-    if SAMPLE:
-        submissions_filename = reddit+"_submissions_sample"
-    else:
-        submissions_filename = reddit+"_submissions"
-    with open(submissions_filename,"r", encoding="UTF-8") as submissions_file:
-        submissions = {}
-        for line in submissions_file:
-            j = json.loads(line)
-            title = " "+cleanup_pattern.sub(' ', j["title"].lower())+" "
-            selftext = " "+cleanup_pattern.sub(' ', j["selftext"].lower())+" "
-            if any([(keyword in selftext or keyword in title) for keyword in KEYWORDS]):
-                submission = {}
-                submission["subreddit"] = j["subreddit"]
-                submission["type"] = "submission"
-                submission["title"] = j["title"]
-                submission["author"] = j["author"]
-                submission["score"] = j["score"]
-                submission["selftext"] = j["selftext"]
-                submission["url"] = j["url"]
-                submission["id"] = "t3_"+j["id"]
-                submission["permalink"] = "https://www.reddit.com"+j["permalink"]
-                submission["created_utc"] = j["created_utc"]
-                submission["date"] = datetime.fromtimestamp(int(j["created_utc"])).strftime('%Y-%m-%d')
-                submission["month"] = datetime.fromtimestamp(int(j["created_utc"])).strftime('%Y-%m')
-                submissions[submission["id"]] = submission
-            continue
-        submission_ids[reddit] = [submission["id"] for submission in submissions.values()]
-    with open("./output/"+reddit+"_submissions"+".csv","w",encoding="UTF-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=SUBMISSION_COLUMNS)
-        writer.writeheader()
-        for submission in submissions.values():
-            writer.writerow(submission)
-    with open("./output/"+reddit+"_submissions"+".json","w",encoding="UTF-8") as jsonfile:
-        json.dump(submissions, jsonfile)
-
-    if SAMPLE:
-        comments_filename = reddit+"_comments_sample"
-    else:
-        comments_filename = reddit+"_comments"
-    with open(comments_filename,"r", encoding="UTF-8") as comments_file:
-        comments = {}
-        comments_by_thread = defaultdict(list)
-        for line in comments_file:
-            j = json.loads(line)
-            body = " "+cleanup_pattern.sub(' ', j["body"].lower())+" "
-            # This only works because the comments are in chronological order
-            # and children cannot come before parents!
-            if j["parent_id"] in submission_ids[reddit] or j["parent_id"] in comments.keys():
-                comment = {}
-                comment["subreddit"] = j["subreddit"]
-                comment["type"] = "comment"
-                comment["author"] = j["author"]
-                comment["score"] = j["score"]
-                comment["body"] = j["body"]
-                comment["id"] = "t1_"+j["id"]
-                comment["parent_id"] = j["parent_id"]
-                comment["submission_id"] = get_submission(j,comments)
-                comment["submission_title"] = submissions[get_submission(j,comments)]["title"]
-                if "permalink" in j:
-                    comment["permalink"] = "https://www.reddit.com"+j["permalink"]
-                else:
-                    # sometimes (maybe because of older API versions) there aren't permalinks
-                    comment["permalink"] = "NONE"
-                comment["created_utc"] = j["created_utc"]
-                comment["date"] = datetime.fromtimestamp(int(j["created_utc"])).strftime('%Y-%m-%d')
-                comments[comment["id"]] = comment
-                comments_by_thread[comment["parent_id"]].append(comment)
-            continue
-        with open("./output/"+reddit+"_comments"+".csv","w",encoding="UTF-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=COMMENT_COLUMNS)
-            writer.writeheader()
-            for thread_id in comments_by_thread:
-                for comment in comments_by_thread[thread_id]:
-                    writer.writerow(comment)
-        with open("./output/"+reddit+"_comments"+".json","w",encoding="UTF-8") as jsonfile:
-            json.dump(comments, jsonfile)
\ No newline at end of file
+import os, sys
+from redditscripts.filtering import Filter
+from redditscripts.instrument import RunReport
+
+if __name__ == "__main__":
+    # --profile runs the script under cProfile and tracemalloc
+    report = RunReport(os.path.splitext(os.path.basename(__file__))[0], profile="--profile" in sys.argv[1:])
+    reddit_filter = Filter(KEYWORDS, SUBMISSION_COLUMNS, COMMENT_COLUMNS, stream_comments=STREAM_COMMENTS,
+                           group_comments_by_thread=GROUP_COMMENTS_BY_THREAD, write_json=WRITE_JSON,
+                           write_json_lines=WRITE_JSON_LINES, write_parquet=WRITE_PARQUET,
+                           workers=WORKERS, json_backend=JSON_BACKEND, prefilter=PREFILTER,
+                           utc_offset=UTC_OFFSET, incremental=INCREMENTAL, report=report)
+    reddit_filter.run(REDDITS, COMBINED_SUBMISSIONS, COMBINED_COMMENTS, SAMPLE)
+    report.finish()
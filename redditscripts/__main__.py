@@ -0,0 +1,3 @@
+from redditscripts.cli import main
+
+main()
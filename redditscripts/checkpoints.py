@@ -0,0 +1,89 @@
+"""
+Checkpoints for incremental runs of the filter scripts.
+
+A full scan reads every line of both dumps, which is wasted work when the
+dumps have only had new months appended, or when the keyword list has
+only grown. After each incremental run the scripts save a checkpoint in
+each reddit's store: the keywords, columns and UTC offset used, and for
+each dump how many bytes were read and a hash of the last bytes before
+that point.
+
+plan_update() compares that checkpoint with the current settings and
+dumps and works out what the next run has to read:
+
+  * lines appended since the checkpoint, with every keyword, and
+  * if keywords were added, the lines already read, with just the new
+    keywords.
+
+Anything else (keywords removed, columns or UTC offset changed, a dump
+rewritten or replaced) means a full scan. Compressed dumps can't be
+resumed part way through, so they are only skipped when they haven't
+changed at all.
+"""
+
+import hashlib
+import os
+
+from redditscripts.dumps import is_compressed
+
+# bytes before the checkpoint that have to be unchanged for a dump to
+# count as appended to rather than rewritten
+TAIL_SIZE = 64 * 1024
+
+
+def _tail_hash(filename, size):
+    with open(filename, "rb") as infile:
+        infile.seek(max(size - TAIL_SIZE, 0))
+        return hashlib.sha1(infile.read(size - infile.tell())).hexdigest()
+
+
+def dump_state(filename):
+    """
+    What a checkpoint records about a dump: its name, size and tail hash.
+    """
+    size = os.path.getsize(filename)
+    return {"filename": filename, "size": size, "tail": _tail_hash(filename, size)}
+
+
+def _appended_to(filename, state):
+    # True if filename is the dump state was taken of, possibly with more
+    # lines added to the end
+    if filename != state["filename"] or not os.path.exists(filename):
+        return False
+    size = os.path.getsize(filename)
+    if size < state["size"] or (is_compressed(filename) and size != state["size"]):
+        return False
+    return _tail_hash(filename, state["size"]) == state["tail"]
+
+
+def make_checkpoint(keywords, columns, states, utc_offset=0):
+    return {"keywords": list(keywords), "columns": columns, "utc_offset": utc_offset, "dumps": states}
+
+
+def plan_update(checkpoint, keywords, columns, states, utc_offset=0):
+    """
+    Work out what has to be read to bring output saved with checkpoint up
+    to date with keywords, columns, utc_offset (the offset the date and
+    month columns are in) and the dumps (a dict of name to
+    dump_state(), taken before reading them). Returns None if it needs a
+    full scan, otherwise (new_keywords, scanned) where scanned maps each
+    dump's name to the number of bytes already read: a dump has to be
+    read from there, and if there are new_keywords, read up to there
+    with only those. A compressed dump already read in full has scanned
+    None, meaning all of it.
+    """
+    if checkpoint is None or checkpoint["columns"] != columns:
+        return None
+    # checkpoints from before the offset was recorded don't say which it was
+    if checkpoint.get("utc_offset") != utc_offset:
+        return None
+    if not set(checkpoint["keywords"]) <= set(keywords):
+        return None
+    scanned = {}
+    for name, state in states.items():
+        previous = checkpoint["dumps"].get(name)
+        if previous is None or not _appended_to(state["filename"], previous):
+            return None
+        scanned[name] = None if is_compressed(state["filename"]) else previous["size"]
+    new_keywords = [keyword for keyword in keywords if keyword not in checkpoint["keywords"]]
+    return new_keywords, scanned
@@ -0,0 +1,152 @@
+"""
+The reddit2csv command, with one subcommand per stage:
+
+    reddit2csv filter REDDIT... --keywords FILE [options]
+    reddit2csv monthly REDDIT... [--keywords FILE] [options]
+    reddit2csv freq-over-time REDDIT... [--keywords FILE] [options]
+
+(or python -m redditscripts ...). The options stand in for the
+constants at the top of the scripts, so a run can be tuned without
+copying a script. Run a subcommand with --help for the list.
+
+Each subcommand imports its module only when it runs, so filter never
+loads nltk or the n-gram code, and starts as fast as it can.
+"""
+
+import argparse
+
+
+def _list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _words_from_file(filename):
+    with open(filename, "r", encoding="UTF-8") as infile:
+        return [line.strip() for line in infile if line.strip() and not line.startswith("#")]
+
+
+def _keywords(args):
+    from redditscripts.matching import keywords_from_file
+
+    keywords = []
+    for filename in args.keywords:
+        keywords.extend(keywords_from_file(filename))
+    keywords.extend(args.keyword)
+    return keywords
+
+
+def _report(args):
+    from redditscripts.instrument import RunReport
+
+    return RunReport("reddit2csv_" + args.command.replace("-", "_"), profile=args.profile)
+
+
+def run_filter(args, parser):
+    from redditscripts.filtering import Filter, SUBMISSION_COLUMNS, COMMENT_COLUMNS
+
+    keywords = _keywords(args)
+    if not keywords:
+        parser.error("no keywords: give a --keywords file or --keyword")
+    if bool(args.combined_submissions) != bool(args.combined_comments):
+        parser.error("--combined-submissions and --combined-comments go together")
+    report = _report(args)
+    try:
+        reddit_filter = Filter(keywords, args.submission_columns or SUBMISSION_COLUMNS, args.comment_columns or COMMENT_COLUMNS,
+                               stream_comments=args.stream_comments, group_comments_by_thread=not args.chronological,
+                               write_json=not args.no_json, write_json_lines=args.jsonl, write_parquet=args.parquet,
+                               background_writer=not args.no_background_writer, workers=args.workers, json_backend=args.json_backend,
+                               prefilter=not args.no_prefilter, utc_offset=args.utc_offset,
+                               incremental=args.incremental, output_dir=args.output_dir, report=report)
+    except (ValueError, ImportError) as error:
+        parser.error(str(error))
+    reddit_filter.run(args.reddits, args.combined_submissions, args.combined_comments, args.sample, args.input_dir)
+    report.finish(args.output_dir)
+
+
+def run_monthly(args, parser):
+    from redditscripts.monthly import monthly_ngrams, CUSTOM_STOPWORDS
+
+    stopwords = _words_from_file(args.stopwords) if args.stopwords else CUSTOM_STOPWORDS
+    report = _report(args)
+    monthly_ngrams(args.reddits, _keywords(args)+stopwords, args.languages, args.sketch_size, args.months,
+                   args.output_dir, report, args.workers)
+    report.finish(args.output_dir)
+
+
+def run_freq_over_time(args, parser):
+    from redditscripts.freq_over_time import freq_over_time, CUSTOM_STOPWORDS
+
+    stopwords = _words_from_file(args.stopwords) if args.stopwords else CUSTOM_STOPWORDS
+    report = _report(args)
+    # the keywords' words, rather than whole keywords as monthly takes them
+    freq_over_time(args.reddits, " ".join(_keywords(args)).split()+stopwords, args.languages, args.months,
+                   args.corpus_top, args.monthly_top, args.output_dir, report)
+    report.finish(args.output_dir)
+
+
+def _common_arguments(parser):
+    parser.add_argument("reddits", nargs="+", metavar="REDDIT", help="subreddit names")
+    parser.add_argument("--keywords", action="append", default=[], metavar="FILE",
+                        help="file of keywords, one per line, spaces around them kept (can be repeated)")
+    parser.add_argument("--keyword", action="append", default=[], metavar="KEYWORD", help="a keyword (can be repeated)")
+    parser.add_argument("--output-dir", default="./output", help="where output goes, and the filter's output is read from (default ./output)")
+    parser.add_argument("--profile", action="store_true", help="profile the run with cProfile and tracemalloc")
+
+
+def _analysis_arguments(parser):
+    parser.add_argument("--stopwords", metavar="FILE", help="file of words to leave out, one per line, instead of the built-in list")
+    parser.add_argument("--languages", type=_list, help="nltk stopword languages, comma-separated (default all)")
+    parser.add_argument("--months", type=_list, help="only these months, comma-separated, e.g. 2020-01,2020-02")
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog="reddit2csv", description="Filter Pushshift Reddit dumps by keyword and analyse what matches.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.required = True
+
+    filter_parser = commands.add_parser("filter", help="find submissions matching keywords, and their comments")
+    _common_arguments(filter_parser)
+    filter_parser.add_argument("--submission-columns", type=_list, metavar="COLUMNS", help="submission columns to write, comma-separated")
+    filter_parser.add_argument("--comment-columns", type=_list, metavar="COLUMNS", help="comment columns to write, comma-separated")
+    filter_parser.add_argument("--input-dir", default="", help="where the <reddit>_submissions and <reddit>_comments dumps are (default .)")
+    filter_parser.add_argument("--sample", action="store_true", help="read the <reddit>_submissions_sample and _comments_sample dumps")
+    filter_parser.add_argument("--combined-submissions", metavar="FILE", help="one submissions dump covering every reddit")
+    filter_parser.add_argument("--combined-comments", metavar="FILE", help="one comments dump covering every reddit")
+    filter_parser.add_argument("--workers", type=int, default=1, help="processes parsing the dumps (default 1)")
+    filter_parser.add_argument("--json-backend", choices=["msgspec", "orjson", "json"], help="JSON library (default the fastest installed)")
+    filter_parser.add_argument("--no-prefilter", action="store_true", help="parse every submission, not only lines that may match")
+    filter_parser.add_argument("--stream-comments", action="store_true", help="write comments as they're read, for very large subreddits")
+    filter_parser.add_argument("--chronological", action="store_true", help="with --stream-comments, write comments in time order instead of by thread")
+    filter_parser.add_argument("--no-json", action="store_true", help="don't write the .json files")
+    filter_parser.add_argument("--jsonl", action="store_true", help="also write the records as JSON Lines")
+    filter_parser.add_argument("--parquet", action="store_true", help="also write the records as Parquet (needs pyarrow)")
+    filter_parser.add_argument("--no-background-writer", action="store_true", help="write output on the main thread")
+    filter_parser.add_argument("--utc-offset", type=float, default=0, help="hours east of UTC for the date and month columns (default 0)")
+    filter_parser.add_argument("--incremental", action="store_true", help="only read what's new since the last incremental run")
+    filter_parser.set_defaults(handler=run_filter, parser=filter_parser)
+
+    monthly_parser = commands.add_parser("monthly", help="monthly text and top words, bigrams and trigrams")
+    _common_arguments(monthly_parser)
+    _analysis_arguments(monthly_parser)
+    monthly_parser.add_argument("--sketch-size", type=int, help="keep at most this many n-grams per month, with approximate counts")
+    monthly_parser.add_argument("--workers", type=int, default=1, help="processes working on different months at once (default 1)")
+    monthly_parser.set_defaults(handler=run_monthly, parser=monthly_parser)
+
+    freq_parser = commands.add_parser("freq-over-time", help="top words of the corpus and their monthly frequencies")
+    _common_arguments(freq_parser)
+    _analysis_arguments(freq_parser)
+    freq_parser.add_argument("--corpus-top", type=int, default=100, help="top corpus words written (default 100)")
+    freq_parser.add_argument("--monthly-top", type=int, default=20, help="top words tracked month by month (default 20)")
+    freq_parser.set_defaults(handler=run_freq_over_time, parser=freq_parser)
+    return parser
+
+
+def main(argv=None):
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    # errors in the options are reported against the subcommand's usage
+    args.handler(args, args.parser)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Word counts by month for the frequency-over-time analysis.
+
+MonthWordCounts counts each document's words once, as it is read, into
+a sparse month x word matrix (a Counter per month). The corpus counts,
+top-N words and per-month counts and frequencies all come from it.
+"""
+
+from collections import Counter
+
+
+class MonthWordCounts:
+    """
+    Sparse month x word count matrix. Months are kept in the order they
+    were first added.
+    """
+
+    def __init__(self):
+        self.months = {}
+
+    def add(self, month, words):
+        """
+        Count words (already lowercased and filtered) towards month.
+        """
+        counts = self.months.get(month)
+        if counts is None:
+            counts = self.months[month] = Counter()
+        counts.update(words)
+
+    def corpus(self):
+        """
+        Counter of every word over all months. Words are in order of first
+        appearance, month by month, so ties in most_common() come out the
+        same as counting one list of the whole corpus would.
+        """
+        corpus = Counter()
+        for counts in self.months.values():
+            corpus.update(counts)
+        return corpus
+
+    def matrix(self, words):
+        """
+        List of (month, total words, [count of each of words]) rows, one per
+        month.
+        """
+        rows = []
+        for month, counts in self.months.items():
+            rows.append((month, sum(counts.values()), [counts[word] for word in words]))
+        return rows
+
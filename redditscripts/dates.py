@@ -0,0 +1,53 @@
+"""
+The date and month columns, from created_utc.
+
+The dumps are in chronological order, so nearly every record falls on a
+day that's just been seen: DateBuckets formats each day once and looks
+it up by day number (seconds // 86400) after that.
+
+Dates are in UTC, or at a fixed offset from it, so they don't depend on
+the timezone of the machine running the script, and every day is
+exactly 86400 seconds long.
+"""
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+SECONDS_PER_DAY = 86400
+
+# days kept formatted; a dump in time order only ever needs the last few
+DAY_CACHE_SIZE = 1024
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def parse_timestamp(created_utc):
+    """
+    created_utc as an int. Depending on the API era it's an int, a float
+    or a string of either.
+    """
+    if isinstance(created_utc, int):
+        return created_utc
+    try:
+        return int(created_utc)
+    except ValueError:
+        return int(float(created_utc))
+
+
+@lru_cache(maxsize=DAY_CACHE_SIZE)
+def _day_strings(day):
+    date = (EPOCH + timedelta(days=day)).strftime("%Y-%m-%d")
+    return date, date[:7]
+
+
+class DateBuckets:
+    """
+    Callable giving the ("YYYY-MM-DD", "YYYY-MM") strings of a
+    created_utc value, utc_offset hours east of UTC.
+    """
+
+    def __init__(self, utc_offset=0):
+        self.offset = round(utc_offset * 3600)
+
+    def __call__(self, created_utc):
+        return _day_strings((parse_timestamp(created_utc) + self.offset) // SECONDS_PER_DAY)
@@ -0,0 +1,90 @@
+"""
+JSON decoding for the dump lines.
+
+A Reddit record has dozens of fields but the scripts only read a handful.
+make_decoder() returns a function that decodes one line into a dict of
+just the fields asked for, using the fastest library installed:
+
+  * msgspec, with a struct of the requested fields, so the others are
+    skipped without building Python objects for them,
+  * orjson, which decodes everything but much faster than json,
+  * the standard library json module otherwise.
+
+Fields missing from a record (permalink, in some eras) are left out of
+the dict, as with json.loads, so `"permalink" in j` still works.
+Values are decoded as they are in the dump: created_utc stays a string or
+an int depending on the era.
+
+msgspec and orjson reject some lines json accepts, like a lone UTF-16
+surrogate escape left by an emoji cut in half, which the dumps have;
+those lines are decoded with json instead.
+"""
+
+import json
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SUBMISSION_FIELDS = ("subreddit", "title", "selftext", "author", "score", "url", "id", "permalink", "created_utc")
+COMMENT_FIELDS = ("subreddit", "author", "score", "body", "id", "parent_id", "permalink", "created_utc")
+THREAD_FIELDS = ("id", "parent_id")
+
+BACKENDS = ("msgspec", "orjson", "json")
+
+
+def available_backend():
+    if msgspec is not None:
+        return "msgspec"
+    if orjson is not None:
+        return "orjson"
+    return "json"
+
+
+def make_decoder(fields, backend=None):
+    """
+    Function decoding one JSON line (bytes or str) into a dict holding at
+    least the given fields. backend is one of BACKENDS and defaults to the
+    fastest one installed.
+    """
+    if backend is None:
+        backend = available_backend()
+    if backend == "msgspec":
+        if msgspec is None:
+            raise ImportError("the msgspec decoder needs the msgspec package (pip install msgspec)")
+        unset = msgspec.UNSET
+        record_type = msgspec.defstruct("Record", [(field, object, unset) for field in fields])
+        decoder = msgspec.json.Decoder(record_type)
+
+        def decode(line):
+            try:
+                record = decoder.decode(line)
+            except msgspec.DecodeError:
+                return json.loads(line)
+            j = {}
+            for field in fields:
+                value = getattr(record, field)
+                if value is not unset:
+                    j[field] = value
+            return j
+        return decode
+    if backend == "orjson":
+        if orjson is None:
+            raise ImportError("the orjson decoder needs the orjson package (pip install orjson)")
+        loads = orjson.loads
+
+        def decode(line):
+            try:
+                return loads(line)
+            except orjson.JSONDecodeError:
+                return json.loads(line)
+        return decode
+    if backend == "json":
+        return json.loads
+    raise ValueError("unknown JSON backend %r, expected one of %s" % (backend, ", ".join(BACKENDS)))
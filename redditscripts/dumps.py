@@ -0,0 +1,86 @@
+"""
+Opening the jsonl dumps, compressed or not.
+
+The Pushshift subreddit dumps ship as zstandard-compressed .zst files.
+open_dump() decompresses them (and .gz/.bz2 files) as a stream, so they
+can be read line by line without writing the decompressed file to disk.
+
+The dumps are compressed with a long window, so the zstd decompressor
+has to be allowed a larger window than its default. zstandard is only
+imported when a .zst file is opened.
+"""
+
+import bz2
+import gzip
+import io
+import os
+
+COMPRESSED_EXTENSIONS = (".zst", ".gz", ".bz2")
+
+# bytes read from disk at a time, and buffered after decompression
+READ_SIZE = 16 * 1024 * 1024
+
+# the Pushshift dumps need a 2 GB window
+ZSTD_MAX_WINDOW_SIZE = 2 ** 31
+
+
+def is_compressed(filename):
+    return filename.endswith(COMPRESSED_EXTENSIONS)
+
+
+def dump_size(filename):
+    """
+    Number of bytes of lines in the dump, or None for a compressed dump,
+    whose decompressed size isn't known without reading it.
+    """
+    if is_compressed(filename):
+        return None
+    return os.path.getsize(filename)
+
+
+def find_dump(filename):
+    """
+    Path of the dump for filename: the file itself if it exists,
+    otherwise the first compressed version found (filename.zst, .gz or
+    .bz2). Returns filename unchanged if none exist, so opening it gives
+    the usual FileNotFoundError.
+    """
+    if os.path.exists(filename):
+        return filename
+    for extension in COMPRESSED_EXTENSIONS:
+        if os.path.exists(filename + extension):
+            return filename + extension
+    return filename
+
+
+def _skip(infile, count):
+    while count > 0:
+        data = infile.read(min(count, READ_SIZE))
+        if not data:
+            break
+        count -= len(data)
+    return infile
+
+
+def open_dump(filename, start=0):
+    """
+    Open a dump for reading as binary lines, decompressing .zst, .gz and
+    .bz2 files on the fly. start skips to that byte offset (of the
+    decompressed data, for compressed dumps, which have to be read up to
+    it).
+    """
+    if filename.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("reading .zst dumps needs the zstandard package (pip install zstandard)")
+        decompressor = zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW_SIZE)
+        reader = decompressor.stream_reader(open(filename, "rb", buffering=READ_SIZE), read_size=READ_SIZE)
+        return _skip(io.BufferedReader(reader, buffer_size=READ_SIZE), start)
+    if filename.endswith(".gz"):
+        return _skip(io.BufferedReader(gzip.GzipFile(filename), buffer_size=READ_SIZE), start)
+    if filename.endswith(".bz2"):
+        return _skip(io.BufferedReader(bz2.BZ2File(filename), buffer_size=READ_SIZE), start)
+    infile = open(filename, "rb", buffering=READ_SIZE)
+    infile.seek(start)
+    return infile
@@ -0,0 +1,463 @@
+"""
+The filter stage: scan submission and comment dumps for keywords and
+write what matches to CSV, JSON and each reddit's SQLite store.
+
+Finds and outputs matching submissions and all comments belonging to
+matching submissions, ignores matching comments to non-matching
+submissions. Submissions and comments are in chronological order.
+
+reddit2csv.py, reddit2csv2.py and `reddit2csv filter`
+(redditscripts.cli) all run Filter.
+"""
+
+import os
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from functools import partial
+
+from redditscripts.checkpoints import dump_state, make_checkpoint, plan_update
+from redditscripts.dates import DateBuckets
+from redditscripts.decoding import COMMENT_FIELDS, SUBMISSION_FIELDS, THREAD_FIELDS, make_decoder
+from redditscripts.dumps import dump_size, find_dump, is_compressed
+from redditscripts.ids import ThreadIndex, fullname_key
+from redditscripts.instrument import RunReport
+from redditscripts.matching import KeywordMatcher, RawPrefilter
+from redditscripts.output import WriterThread, import_pyarrow, open_rows, write_rows
+from redditscripts.parallel import can_fork, map_lines
+from redditscripts.records import Comment, Submission, intern, row_getter
+from redditscripts.store import CorpusStore, store_filename
+from redditscripts.streaming import ExternalSorter
+
+# every column Filter can write, in the default order
+SUBMISSION_COLUMNS = ["subreddit", "type", "title", "author", "score", "selftext", "url", "id", "permalink", "created_utc", "date", "month", "matched_keywords"]
+COMMENT_COLUMNS = ["subreddit", "type", "author", "score", "body", "id", "parent_id", "submission_id", "submission_title", "permalink", "created_utc", "date", "month"]
+
+# columns the store, incremental runs and the analysis scripts rely on
+REQUIRED_SUBMISSION_COLUMNS = ["id", "title", "selftext", "month"]
+REQUIRED_COMMENT_COLUMNS = ["id", "parent_id", "submission_id", "body"]
+
+# columns stored as integers in Parquet output
+INTEGER_COLUMNS = ["score", "created_utc"]
+
+cleanup_pattern = re.compile(r'[\W_]+')
+
+# the Filter whose passes are running; the forked workers inherit it, so
+# only these functions (by name) and their arguments go to them
+_running = None
+
+
+def _match_submission(routes, line, only=None):
+    return _running.match_submission(routes, line, only)
+
+
+def _comment_thread_ids(line):
+    return _running.comment_thread_ids(line)
+
+
+def _check_columns(kind, columns, known, required):
+    unknown = [column for column in columns if column not in known]
+    if unknown:
+        raise ValueError("unknown %s columns: %s (expected some of %s)" % (kind, ", ".join(unknown), ", ".join(known)))
+    missing = [column for column in required if column not in columns]
+    if missing:
+        raise ValueError("%s columns must include %s" % (kind, ", ".join(missing)))
+
+
+class Filter:
+    """
+    One set of keywords and output settings, run over any number of
+    reddits with run(). Each argument replaces one of the constants
+    reddit2csv.py has (keywords is KEYWORDS, workers is WORKERS and so
+    on). Columns can be any of SUBMISSION_COLUMNS and COMMENT_COLUMNS, in
+    any order, as long as they include the REQUIRED_ ones.
+    """
+
+    def __init__(self, keywords, submission_columns=SUBMISSION_COLUMNS, comment_columns=COMMENT_COLUMNS,
+                 stream_comments=False, group_comments_by_thread=True, write_json=True, write_json_lines=False,
+                 write_parquet=False, background_writer=True, workers=1, json_backend=None, prefilter=True,
+                 utc_offset=0, incremental=False, output_dir="./output", report=None):
+        _check_columns("submission", submission_columns, SUBMISSION_COLUMNS, REQUIRED_SUBMISSION_COLUMNS)
+        _check_columns("comment", comment_columns, COMMENT_COLUMNS, REQUIRED_COMMENT_COLUMNS)
+        self.keywords = list(keywords)
+        self.submission_columns = list(submission_columns)
+        self.comment_columns = list(comment_columns)
+        self.stream_comments = stream_comments
+        self.group_comments_by_thread = group_comments_by_thread
+        # formats written in record order; the CSV files always are too
+        self.formats = [kind for kind, wanted in (("json", write_json), ("jsonl", write_json_lines), ("parquet", write_parquet)) if wanted]
+        if write_parquet:
+            import_pyarrow()
+        self.background_writer = background_writer
+        self.writer_thread = None
+        self.workers = workers
+        self.prefilter = prefilter
+        self.incremental = incremental
+        self.output_dir = output_dir
+        self.report = report if report is not None else RunReport("filter")
+        self.keyword_matcher = KeywordMatcher(self.keywords)
+        self.line_filter = RawPrefilter(self.keywords)
+        self.decode_submission = make_decoder(SUBMISSION_FIELDS, json_backend)
+        self.decode_comment = make_decoder(COMMENT_FIELDS, json_backend)
+        self.decode_thread_ids = make_decoder(THREAD_FIELDS, json_backend)
+        self.utc_offset = utc_offset
+        self.date_month = DateBuckets(utc_offset)
+        # {submission id: title} of the reddits being filtered, for the
+        # comments' submission_title column
+        self.titles = {}
+        self.submission_row = row_getter(self.submission_columns)
+        self.comment_row = row_getter(self.comment_columns, self.titles)
+        self.submission_ids = {}
+        self.comment_counts = defaultdict(int)
+        self.timings = defaultdict(float)
+
+    def _open_rows(self, name, columns, kinds):
+        return [open_rows(kind, os.path.join(self.output_dir, name), columns, self.writer_thread, INTEGER_COLUMNS) for kind in kinds]
+
+    def match_submission(self, routes, line, only=None):
+        """
+        Parse one submissions line and return it as a Submission if it
+        matches any keyword, otherwise None. With routes (lowercased
+        subreddit names), submissions from other subreddits are skipped
+        before they're matched. With only, a (RawPrefilter,
+        KeywordMatcher) pair for some of the keywords, submissions are
+        only returned if they match one of those, but still list every
+        keyword they match.
+        Runs in the worker processes when workers > 1.
+        """
+        line_filter, matcher = (self.line_filter, self.keyword_matcher) if only is None else only
+        if self.prefilter and not line_filter.may_match(line):
+            return None
+        j = self.decode_submission(line)
+        if routes is not None and j["subreddit"].lower() not in routes:
+            return None
+        title = " "+cleanup_pattern.sub(' ', j["title"].lower())+" "
+        selftext = " "+cleanup_pattern.sub(' ', j["selftext"].lower())+" "
+        matched_keywords = matcher.matches(title, selftext)
+        if not matched_keywords:
+            return None
+        if matcher is not self.keyword_matcher:
+            matched_keywords = self.keyword_matcher.matches(title, selftext)
+        date, month = self.date_month(j["created_utc"])
+        return Submission(intern(j["subreddit"]), j["title"], intern(j["author"]), j["score"], j["selftext"], j["url"],
+                          "t3_"+j["id"], j["permalink"], j["created_utc"], date, month,
+                          ";".join([keyword.strip() for keyword in matched_keywords]))
+
+    def comment_thread_ids(self, line):
+        """
+        Parse one comments line into (comment fullname, parent fullname,
+        line). Thread membership depends on every earlier comment, so
+        it's resolved in the main process, which only parses the full
+        comment again if it's kept.
+        """
+        j = self.decode_thread_ids(line)
+        return "t1_"+j["id"], j["parent_id"], line
+
+    def make_comment(self, j, submission_id):
+        date, month = self.date_month(j["created_utc"])
+        return Comment(intern(j["subreddit"]), intern(j["author"]), j["score"], j["body"], "t1_"+j["id"], j["parent_id"],
+                       submission_id, j.get("permalink"), j["created_utc"], date, month)
+
+    def write_submissions(self, reddit, submissions):
+        """
+        Write one reddit's matched submissions to CSV and the other
+        formats.
+        """
+        writers = self._open_rows(reddit+"_submissions", self.submission_columns, ["csv"] + self.formats)
+        write_rows(writers, map(self.submission_row, submissions.values()))
+        for writer in writers:
+            writer.close()
+
+    def write_comments(self, reddit, comments, comments_by_thread):
+        """
+        Write one reddit's matched comments to CSV (grouped by parent) and
+        the other formats (in the order they were read).
+        """
+        csv_rows, = self._open_rows(reddit+"_comments", self.comment_columns, ["csv"])
+        csv_rows.write_rows(self.comment_row(comment) for thread in comments_by_thread.values() for comment in thread)
+        csv_rows.close()
+        writers = self._open_rows(reddit+"_comments", self.comment_columns, self.formats)
+        write_rows(writers, map(self.comment_row, comments.values()))
+        for writer in writers:
+            writer.close()
+
+    def scan_comments_streaming(self, reddits, comments_filename, submission_reddits, stores):
+        """
+        Streaming version of the comment pass. Each matched comment is
+        written to its reddit's files as soon as it's read and only a
+        compact comment -> submission index is kept in memory. With
+        group_comments_by_thread the CSVs are sorted on disk into the
+        same order the non-streaming pass writes.
+        """
+        report = self.report
+        thread_index = ThreadIndex(submission_reddits.keys())
+        outputs = {}
+        for reddit in reddits:
+            csv_rows, = self._open_rows(reddit+"_comments", self.comment_columns, ["csv"])
+            writers = self._open_rows(reddit+"_comments", self.comment_columns, self.formats)
+            sorter = ExternalSorter() if self.group_comments_by_thread else None
+            outputs[reddit] = (csv_rows, writers, sorter, {})
+        with report.phase("comments", dump_size(comments_filename), filters=True) as phase:
+            comment_lines = map_lines(comments_filename, _comment_thread_ids, self.workers, progress=phase.advance)
+            for line_number, (comment_id, parent_id, line) in enumerate(comment_lines):
+                submission_id = thread_index.add_comment(comment_id, parent_id)
+                if submission_id is None:
+                    continue
+                phase.records += 1
+                start = time.perf_counter()
+                reddit = submission_reddits[submission_id]
+                csv_rows, writers, sorter, thread_order = outputs[reddit]
+                comment = self.make_comment(self.decode_comment(line), submission_id)
+                self.comment_counts[reddit] += 1
+                row = self.comment_row(comment)
+                stores[reddit].add_comment_row(row)
+                for writer in writers:
+                    writer.write(row)
+                if sorter is None:
+                    csv_rows.write(row)
+                else:
+                    # group by parent, in order of each parent's first reply
+                    thread = thread_order.setdefault(fullname_key(comment.parent_id), len(thread_order))
+                    sorter.add((thread, line_number), row)
+                self.timings[reddit] += time.perf_counter() - start
+        with report.phase("write"):
+            for reddit, (csv_rows, writers, sorter, thread_order) in outputs.items():
+                start = time.perf_counter()
+                for writer in writers:
+                    writer.close()
+                if sorter is not None:
+                    csv_rows.write_rows(sorter.sorted_rows())
+                csv_rows.close()
+                self.timings[reddit] += time.perf_counter() - start
+
+    def scan(self, reddits, submissions_filename, comments_filename, mixed):
+        """
+        Scan one submissions dump and one comments dump and write the
+        output for every reddit in reddits. A reddit's own dump is taken
+        as is; mixed dumps have each record routed by its subreddit
+        field, skipping subreddits that weren't asked for. Comments are
+        tied to submissions through one ThreadIndex covering every
+        reddit, so each dump is only read once.
+        Time spent on each reddit's records and output is added to
+        timings.
+        """
+        report = self.report
+        if mixed:
+            routes = {reddit.lower(): reddit for reddit in reddits}
+        else:
+            routes = None
+        with ExitStack() as stack:
+            stores = {}
+            for reddit in reddits:
+                stores[reddit] = stack.enter_context(CorpusStore(store_filename(reddit, self.output_dir), replace=True))
+                stores[reddit].create(self.submission_columns, self.comment_columns)
+            submissions = {reddit: {} for reddit in reddits}
+            submission_reddits = {}
+            self.titles.clear()
+            with report.phase("submissions", dump_size(submissions_filename), filters=True) as phase:
+                submission_lines = map_lines(submissions_filename, partial(_match_submission, routes), self.workers, progress=phase.advance)
+                for submission in phase.count(submission_lines):
+                    reddit = reddits[0] if routes is None else routes[submission.subreddit.lower()]
+                    submissions[reddit][submission.id] = submission
+                    submission_reddits[submission.id] = reddit
+                    self.titles[submission.id] = submission.title
+                    stores[reddit].add_submission_row(self.submission_row(submission))
+            with report.phase("write"):
+                for reddit in reddits:
+                    start = time.perf_counter()
+                    self.submission_ids[reddit] = set(submissions[reddit].keys())
+                    self.write_submissions(reddit, submissions[reddit])
+                    self.timings[reddit] += time.perf_counter() - start
+
+            if self.stream_comments:
+                self.scan_comments_streaming(reddits, comments_filename, submission_reddits, stores)
+                return
+            comments = {reddit: {} for reddit in reddits}
+            comments_by_thread = {reddit: defaultdict(list) for reddit in reddits}
+            thread_index = ThreadIndex(submission_reddits.keys())
+            with report.phase("comments", dump_size(comments_filename), filters=True) as phase:
+                for comment_id, parent_id, line in map_lines(comments_filename, _comment_thread_ids, self.workers, progress=phase.advance):
+                    # This only works because the comments are in chronological order
+                    # and children cannot come before parents!
+                    submission_id = thread_index.add_comment(comment_id, parent_id)
+                    if submission_id is not None:
+                        phase.records += 1
+                        start = time.perf_counter()
+                        reddit = submission_reddits[submission_id]
+                        comment = self.make_comment(self.decode_comment(line), submission_id)
+                        comments[reddit][comment.id] = comment
+                        stores[reddit].add_comment_row(self.comment_row(comment))
+                        comments_by_thread[reddit][comment.parent_id].append(comment)
+                        self.timings[reddit] += time.perf_counter() - start
+            with report.phase("write"):
+                for reddit in reddits:
+                    start = time.perf_counter()
+                    self.comment_counts[reddit] += len(comments[reddit])
+                    self.write_comments(reddit, comments[reddit], comments_by_thread[reddit])
+                    self.timings[reddit] += time.perf_counter() - start
+
+    def add_comments(self, comments_filename, thread_index, submission_reddits, stores, phase, start=0, end=None):
+        """
+        Add the comments in part of a comments dump that belong to a
+        thread in thread_index to their reddit's store, with their offset
+        in the dump. Lines read and comments kept are counted in phase.
+        """
+        comment_lines = map_lines(comments_filename, _comment_thread_ids, self.workers, start=start, end=end, offsets=True, progress=phase.advance)
+        for position, (comment_id, parent_id, line) in comment_lines:
+            submission_id = thread_index.add_comment(comment_id, parent_id)
+            if submission_id is not None:
+                phase.records += 1
+                reddit = submission_reddits[submission_id]
+                comment = self.make_comment(self.decode_comment(line), submission_id)
+                stores[reddit].add_comment_row(self.comment_row(comment), position)
+
+    def write_store(self, reddit, store):
+        """
+        Write one reddit's output files from its store, in the same order
+        as scan() writes them.
+        """
+        writers = self._open_rows(reddit+"_submissions", self.submission_columns, ["csv"] + self.formats)
+        write_rows(writers, store.submissions(self.submission_columns))
+        for writer in writers:
+            writer.close()
+        csv_rows, = self._open_rows(reddit+"_comments", self.comment_columns, ["csv"])
+        csv_rows.write_rows(store.comments(self.comment_columns, by_parent=self.group_comments_by_thread or not self.stream_comments))
+        csv_rows.close()
+        writers = self._open_rows(reddit+"_comments", self.comment_columns, self.formats)
+        write_rows(writers, store.comments(self.comment_columns))
+        for writer in writers:
+            writer.close()
+
+    def update(self, reddits, submissions_filename, comments_filename, mixed):
+        """
+        Incremental version of scan(). Reads only the parts of the dumps
+        that plan_update() says are needed, adds what it finds to the
+        reddits' stores, and rewrites their output from the stores.
+        """
+        report = self.report
+        if mixed:
+            routes = {reddit.lower(): reddit for reddit in reddits}
+        else:
+            routes = None
+        with ExitStack() as stack:
+            stores = {reddit: stack.enter_context(CorpusStore(store_filename(reddit, self.output_dir))) for reddit in reddits}
+            columns = [self.submission_columns, self.comment_columns]
+            states = {"submissions": dump_state(submissions_filename), "comments": dump_state(comments_filename)}
+            # stop at the sizes the checkpoint will record, even if the dumps
+            # grow while they're being read
+            ends = {name: None if is_compressed(state["filename"]) else state["size"] for name, state in states.items()}
+            checkpoints = [store.checkpoint() for store in stores.values()]
+            plan = None
+            if all(checkpoint == checkpoints[0] for checkpoint in checkpoints):
+                plan = plan_update(checkpoints[0], self.keywords, columns, states, self.utc_offset)
+            if plan is None:
+                for store in stores.values():
+                    store.create(self.submission_columns, self.comment_columns)
+                new_keywords, scanned = [], {"submissions": 0, "comments": 0}
+            else:
+                new_keywords, scanned = plan
+
+            submission_reddits = {}
+            self.titles.clear()
+            for reddit, store in stores.items():
+                for submission_id, title in store.submissions(["id", "title"]):
+                    submission_reddits[submission_id] = reddit
+                    self.titles[submission_id] = title
+
+            # the lines read by earlier runs, for the new keywords
+            if new_keywords:
+                only = (RawPrefilter(new_keywords), KeywordMatcher(new_keywords))
+                found = []
+                with report.phase("submissions, new keywords", scanned["submissions"], filters=True) as phase:
+                    submission_lines = map_lines(submissions_filename, partial(_match_submission, routes, only=only), self.workers, end=scanned["submissions"], offsets=True, progress=phase.advance)
+                    for position, submission in phase.count(submission_lines):
+                        reddit = reddits[0] if routes is None else routes[submission.subreddit.lower()]
+                        # submissions matched before get their matched_keywords updated
+                        if submission.id not in submission_reddits:
+                            found.append(submission.id)
+                        submission_reddits[submission.id] = reddit
+                        self.titles[submission.id] = submission.title
+                        stores[reddit].add_submission_row(self.submission_row(submission), position)
+                with report.phase("comments, new keywords", scanned["comments"], filters=True) as phase:
+                    self.add_comments(comments_filename, ThreadIndex(found), submission_reddits, stores, phase, end=scanned["comments"])
+
+            # the lines added since, for every keyword
+            if scanned["submissions"] is not None:
+                total = None if ends["submissions"] is None else ends["submissions"] - scanned["submissions"]
+                with report.phase("submissions", total, filters=True) as phase:
+                    submission_lines = map_lines(submissions_filename, partial(_match_submission, routes), self.workers, start=scanned["submissions"], end=ends["submissions"], offsets=True, progress=phase.advance)
+                    for position, submission in phase.count(submission_lines):
+                        reddit = reddits[0] if routes is None else routes[submission.subreddit.lower()]
+                        submission_reddits[submission.id] = reddit
+                        self.titles[submission.id] = submission.title
+                        stores[reddit].add_submission_row(self.submission_row(submission), position)
+            if scanned["comments"] is not None:
+                total = None if ends["comments"] is None else ends["comments"] - scanned["comments"]
+                with report.phase("comments", total, filters=True) as phase:
+                    thread_index = ThreadIndex(submission_reddits.keys())
+                    for store in stores.values():
+                        for comment_id, parent_id in store.comments(["id", "parent_id"]):
+                            thread_index.add_comment(comment_id, parent_id)
+                    self.add_comments(comments_filename, thread_index, submission_reddits, stores, phase, start=scanned["comments"], end=ends["comments"])
+
+            with report.phase("write"):
+                for reddit, store in stores.items():
+                    start = time.perf_counter()
+                    self.write_store(reddit, store)
+                    store.set_checkpoint(make_checkpoint(self.keywords, columns, states, self.utc_offset))
+                    self.submission_ids[reddit] = set(submission_id for submission_id, in store.submissions(["id"]))
+                    self.comment_counts[reddit] += store.counts()[1]
+                    self.timings[reddit] += time.perf_counter() - start
+
+    def run(self, reddits, combined_submissions=None, combined_comments=None, sample=False, input_dir=""):
+        """
+        Filter each reddit's <reddit>_submissions and <reddit>_comments
+        dumps in input_dir (the _sample files with sample; the current
+        directory if input_dir is empty), or, given
+        combined_submissions and combined_comments, scan those once for
+        every reddit. Prints each reddit's counts, adds them to the
+        report's info and returns them.
+        """
+        global _running
+        os.makedirs(self.output_dir, exist_ok=True)
+        run = self.update if self.incremental else self.scan
+        suffix = "_sample" if sample else ""
+        _running = self
+        # the worker processes are forked, which isn't safe once another
+        # thread is running, so with workers the output is written here
+        if self.background_writer and not (self.workers > 1 and can_fork()):
+            self.writer_thread = WriterThread()
+        failed = True
+        try:
+            if combined_submissions:
+                # one scan over a dump holding every reddit
+                start = time.perf_counter()
+                run(reddits, find_dump(combined_submissions), find_dump(combined_comments), True)
+                print("Scanned", len(reddits), "subreddits in %.1fs" % (time.perf_counter() - start))
+            else:
+                for reddit in reddits:
+                    submissions_filename = find_dump(os.path.join(input_dir, reddit+"_submissions"+suffix))
+                    comments_filename = find_dump(os.path.join(input_dir, reddit+"_comments"+suffix))
+                    # the reddit's own files, so all of the scan is its time
+                    start = time.perf_counter()
+                    run([reddit], submissions_filename, comments_filename, False)
+                    self.timings[reddit] = time.perf_counter() - start
+            failed = False
+        finally:
+            _running = None
+            writer_thread, self.writer_thread = self.writer_thread, None
+            if writer_thread is not None:
+                # wait for the files still being written
+                with self.report.phase("write"):
+                    try:
+                        writer_thread.close()
+                    except Exception:
+                        # the error the run stopped with matters more
+                        if not failed:
+                            raise
+        for reddit in reddits:
+            print(reddit+":", len(self.submission_ids[reddit]), "submissions,", self.comment_counts[reddit], "comments, %.1fs" % self.timings[reddit])
+        counts = {reddit: {"submissions": len(self.submission_ids[reddit]), "comments": self.comment_counts[reddit], "seconds": round(self.timings[reddit], 3)} for reddit in reddits}
+        self.report.info["reddits"] = counts
+        return counts
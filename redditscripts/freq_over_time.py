@@ -0,0 +1,88 @@
+"""
+Word frequencies over time, from the filter stage's output.
+
+Writes the most frequent words of each reddit's whole corpus with their
+counts and frequencies, and the monthly counts and frequencies of the
+top ones. reddit2csv4.py and `reddit2csv freq-over-time`
+(redditscripts.cli) both run freq_over_time().
+"""
+
+import os
+import re
+
+from redditscripts.counts import MonthWordCounts
+from redditscripts.instrument import RunReport
+from redditscripts.monthly import process_stopwords
+from redditscripts.store import open_store
+from redditscripts.text import load_stopwords, filter_tokens
+
+# left out of the counts, along with the words of the keywords
+CUSTOM_STOPWORDS = ["breast", "breasts", "cancer"]+[str(n) for n in range(0, 11)]
+
+# Number of top corpus words written to _corpus_freq.csv, and tracked
+# month by month in _monthly_freq.csv and _monthly_count.csv
+CORPUS_TOP_WORDS = 100
+MONTHLY_TOP_WORDS = 20
+
+
+def freq_over_time(reddits, custom_stopwords, stopword_languages=None, months=None, corpus_top_words=CORPUS_TOP_WORDS,
+                   monthly_top_words=MONTHLY_TOP_WORDS, output_dir="./output", report=None):
+    """
+    Write each reddit's corpus and monthly word frequencies under
+    <output_dir>/freq-over-time, leaving out nltk's stopwords and
+    custom_stopwords. months, a list like ["2020-01"], limits the counts
+    to those months.
+    """
+    if report is None:
+        report = RunReport("freq-over-time")
+    os.makedirs(os.path.join(output_dir, "freq-over-time"), exist_ok=True)
+    with report.phase("stopwords"):
+        nltk_stopwords = load_stopwords(stopword_languages)
+    custom_stopwords = process_stopwords(custom_stopwords, nltk_stopwords)
+    print("Stopwords:", custom_stopwords)
+    stopwords = nltk_stopwords | frozenset(custom_stopwords)
+
+    for reddit in reddits:
+        word_counts = MonthWordCounts()
+        with open_store(reddit, output_dir) as store:
+            reddit_months = [month for month in store.months() if months is None or month in months]
+            with report.phase("months", len(reddit_months), "months") as phase:
+                for month in reddit_months:
+                    rows = 0
+                    for title, selftext in store.submissions(["title", "selftext"], month):
+                        rows += 1
+                        words = re.findall(r'\w+', title+" "+selftext)
+                        word_counts.add(month, filter_tokens(words, stopwords))
+
+                    # Use the submission month to avoid sparse data
+                    for body, in store.comments(["body"], month):
+                        rows += 1
+                        words = re.findall(r'\w+', body)
+                        word_counts.add(month, filter_tokens(words, stopwords))
+                    phase.advance(1, rows)
+
+        with report.phase("write"):
+            prefix = os.path.join(output_dir, "freq-over-time", reddit)
+            # figure out total corpus freqs
+            corpus_frequency = word_counts.corpus()
+            corpus_word_count = sum(corpus_frequency.values())
+            with open(prefix+"_corpus_freq.csv", "w", encoding="UTF-8") as outfile:
+                outfile.writelines([word + ", " + str(count) + ", " + str(round(count/corpus_word_count, 7)) + "\n" for word, count in corpus_frequency.most_common(corpus_top_words)])
+
+            # counts of the top words for every month, shared by both files
+            freq_words = [word for word, count in corpus_frequency.most_common(monthly_top_words)]
+            monthly_counts = word_counts.matrix(freq_words)
+
+            with open(prefix+"_monthly_freq.csv", "w", encoding="UTF-8") as outfile:
+                outfile.write("month,"+",".join(freq_words)+"\n")
+                for month, word_count, counts in monthly_counts:
+                    freqs = [month]
+                    freqs.extend([str(round(count/word_count, 7)) if word_count else "0.0" for count in counts])
+                    outfile.write(",".join(freqs)+"\n")
+
+            with open(prefix+"_monthly_count.csv", "w", encoding="UTF-8") as outfile:
+                outfile.write("[month],[total words],"+",".join(freq_words)+"\n")
+                for month, word_count, counts in monthly_counts:
+                    freqs = [month, str(word_count)]
+                    freqs.extend([str(count) for count in counts])
+                    outfile.write(",".join(freqs)+"\n")
@@ -0,0 +1,50 @@
+"""
+Id lookups for the comment pass.
+
+Comments only make it into the output if they belong to a matched
+submission's thread. ThreadIndex keeps the submission ids and records
+each matched comment's root submission as it is read, so every comment
+resolves with a single lookup on its parent.
+
+Ids are stored as ints decoded from base36 rather than as strings, which
+keeps the index small enough to hold for the largest subreddits.
+"""
+
+
+def fullname_key(fullname):
+    """
+    Compact int for a Reddit fullname ("t1_abc" or "t3_abc").
+    The low bit records the type so comment and submission ids can't
+    collide.
+    """
+    return (int(fullname[3:], 36) << 1) | (fullname[0:3] == "t1_")
+
+
+class ThreadIndex:
+    """
+    Maps matched comments to their root submission using ints instead of
+    comment dicts. Relies on comments arriving in chronological order, so
+    a parent is always added before its children.
+    """
+
+    def __init__(self, submission_ids):
+        self.submissions = {fullname_key(s): s for s in submission_ids}
+        self.comments = {}
+
+    def __len__(self):
+        return len(self.comments)
+
+    def add_comment(self, comment_id, parent_id):
+        """
+        Record a comment and return the fullname of the submission it
+        belongs to, or None if it isn't in a matched thread.
+        """
+        parent = fullname_key(parent_id)
+        if parent in self.submissions:
+            root = parent
+        else:
+            root = self.comments.get(parent)
+            if root is None:
+                return None
+        self.comments[fullname_key(comment_id)] = root
+        return self.submissions[root]
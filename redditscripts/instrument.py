@@ -0,0 +1,205 @@
+"""
+Timing, throughput and progress reporting for the scripts.
+
+RunReport splits a run into named phases (the submission pass, the
+comment pass, writing output and so on) and keeps, for each one, the
+time spent in it, how many lines and bytes it read and how many records
+it kept. While a phase runs it prints a progress line every
+PROGRESS_INTERVAL seconds, with an ETA when the total is known, and at
+the end of the run the whole report is printed and written out as JSON.
+Progress and the summary go to stderr.
+
+With profile=True (the scripts' --profile flag) the run is also
+profiled with cProfile and tracemalloc. That only sees the main process,
+so with WORKERS > 1 the time spent in the workers shows up as waiting
+for their results; profile with WORKERS = 1 to see all of it.
+Tracemalloc slows everything down a lot, so the timings of a profiled
+run are only useful relative to each other.
+"""
+
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# seconds between progress lines
+PROGRESS_INTERVAL = 10
+
+# functions and allocation sites listed by --profile
+PROFILE_TOP = 25
+
+
+def _size(nbytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if nbytes < 1024 or unit == "GB":
+            return "%.1f %s" % (nbytes, unit)
+        nbytes /= 1024
+
+
+def _duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return "%d:%02d:%02d" % (hours, minutes, seconds)
+
+
+class Phase:
+    """
+    Running totals for one phase of a run. amount counts progress in
+    unit ("bytes" for the dumps, "months" for the analysis scripts),
+    lines the lines or rows read and records the ones kept. A phase that
+    filters (keeps some of its lines) reports its match rate, even when
+    it keeps none.
+    """
+
+    def __init__(self, name, unit, filters=False):
+        self.name = name
+        self.unit = unit
+        self.filters = filters
+        self.seconds = 0.0
+        self.amount = 0
+        self.lines = 0
+        self.records = 0
+        self._started = None
+        self._done = 0
+        self._total = None
+        self._reported = 0.0
+
+    def advance(self, amount, lines=0):
+        """
+        Add progress: amount more units, and lines more lines, done.
+        Suits map_lines()'s progress argument.
+        """
+        self.amount += amount
+        self.lines += lines
+        self._done += amount
+        now = time.perf_counter()
+        if now - self._reported >= PROGRESS_INTERVAL:
+            self._reported = now
+            print(self._progress(now), file=sys.stderr, flush=True)
+
+    def count(self, records):
+        """
+        Iterate over records, counting them as kept.
+        """
+        for record in records:
+            self.records += 1
+            yield record
+
+    def _rate(self, amount, seconds):
+        return amount / seconds if seconds else 0.0
+
+    def _progress(self, now):
+        elapsed = now - self._started
+        rate = self._rate(self._done, elapsed)
+        if self.unit == "bytes":
+            line = self.name + ": " + _size(self._done)
+            if self._total:
+                line += " of " + _size(self._total)
+            speed = _size(rate) + "/s"
+        else:
+            line = self.name + ": %d" % self._done
+            if self._total:
+                line += " of %d" % self._total
+            line += " " + self.unit
+            speed = "%.1f %s/s" % (rate, self.unit)
+        if self._total:
+            line += " (%.1f%%)" % (100 * self._done / self._total)
+        line += ", %d lines, %.0f lines/s, %s" % (self.lines, self._rate(self.lines, self.seconds + elapsed), speed)
+        if self._total and rate:
+            line += ", ETA " + _duration((self._total - self._done) / rate)
+        return line
+
+    def summary(self):
+        summary = {"seconds": round(self.seconds, 3), self.unit: self.amount, "lines": self.lines, "records": self.records}
+        summary[self.unit + "_per_s"] = round(self._rate(self.amount, self.seconds), 1)
+        summary["lines_per_s"] = round(self._rate(self.lines, self.seconds), 1)
+        summary["match_rate"] = None
+        if self.filters:
+            summary["match_rate"] = round(self.records / self.lines, 6) if self.lines else 0.0
+        return summary
+
+
+class RunReport:
+    """
+    Phases of one run of a script, in the order they first ran. info
+    takes anything else the script wants in the JSON report.
+    """
+
+    def __init__(self, script, profile=False):
+        self.script = script
+        self.phases = {}
+        self.info = {}
+        self._started = time.perf_counter()
+        self._profiler = None
+        if profile:
+            tracemalloc.start()
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @contextmanager
+    def phase(self, name, total=None, unit="bytes", filters=False):
+        """
+        Time a block as part of the named phase (time adds up if the
+        phase runs more than once) and yield its Phase to record progress
+        on. total is how many units the block will do, for the ETA.
+        filters marks a phase that keeps only some of the lines it reads.
+        """
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(name, unit, filters)
+        phase._started = phase._reported = time.perf_counter()
+        phase._done = 0
+        phase._total = total
+        try:
+            yield phase
+        finally:
+            phase.seconds += time.perf_counter() - phase._started
+
+    def _profile_summary(self, prof_filename):
+        self._profiler.disable()
+        self._profiler.dump_stats(prof_filename)
+        stats = pstats.Stats(self._profiler, stream=sys.stderr)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:PROFILE_TOP]
+        tracemalloc.stop()
+        print("peak traced memory: " + _size(peak), file=sys.stderr)
+        for statistic in top:
+            print(statistic, file=sys.stderr)
+        return {
+            "profile": prof_filename,
+            "peak_memory_bytes": peak,
+            "top_allocations": [{"line": str(statistic.traceback), "bytes": statistic.size, "count": statistic.count} for statistic in top],
+        }
+
+    def finish(self, output_dir="./output"):
+        """
+        Print the report and write it to <output_dir>/<script>_report.json.
+        With profiling, also print the top functions and allocations and
+        save the cProfile stats to <output_dir>/<script>.prof.
+        """
+        report = {"script": self.script, "seconds": round(time.perf_counter() - self._started, 3)}
+        report["phases"] = {name: phase.summary() for name, phase in self.phases.items()}
+        report.update(self.info)
+        if self._profiler is not None:
+            report.update(self._profile_summary(output_dir + "/" + self.script + ".prof"))
+        for name, summary in report["phases"].items():
+            line = "%s: %.1fs" % (name, summary["seconds"])
+            phase = self.phases[name]
+            if phase.lines:
+                line += ", %d lines (%.0f/s)" % (phase.lines, summary["lines_per_s"])
+            if phase.amount and phase.unit == "bytes":
+                line += ", " + _size(phase.amount) + " (" + _size(summary["bytes_per_s"]) + "/s)"
+            elif phase.amount:
+                line += ", %d %s" % (phase.amount, phase.unit)
+            if summary["match_rate"] is not None:
+                line += ", %d kept (%.4f%%)" % (summary["records"], 100 * summary["match_rate"])
+            print(line, file=sys.stderr)
+        filename = output_dir + "/" + self.script + "_report.json"
+        with open(filename, "w", encoding="UTF-8") as outfile:
+            json.dump(report, outfile, indent=2)
+        print(self.script + ": %.1fs, report in %s" % (report["seconds"], filename), file=sys.stderr)
+        return report
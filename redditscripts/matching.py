@@ -0,0 +1,203 @@
+"""
+Multi-keyword matching for the submission pass.
+
+KeywordMatcher compiles the keyword list once and scans all fields in a
+single pass:
+
+  * a combined regex (built from a trie of the keywords, so alternatives
+    sharing a prefix share the work) answers "does anything match?",
+    which is all that is needed for the vast majority of records, and
+  * an Aho-Corasick automaton collects every keyword that occurs,
+    including overlapping ones (" stay flat" and " staying flat"), for
+    the records that do match.
+
+Fields are joined with a separator that the cleaned text can never contain,
+so a keyword can't match across the end of the title and the start of the
+selftext, the same as testing each field on its own.
+
+RawPrefilter rejects dump lines that can't match before they are parsed
+as JSON. keywords_from_file() reads a keyword list kept in a file, for
+`reddit2csv filter --keywords`.
+"""
+
+import re
+from collections import deque
+
+# cleanup_pattern reduces text to word characters and spaces, so NUL
+# can't appear in a cleaned field
+FIELD_SEPARATOR = "\x00"
+
+# above this many tokens RawPrefilter uses one regex instead of a bytes
+# search per token
+FIND_TOKENS_LIMIT = 20
+
+
+def _trie_pattern(keywords):
+    """
+    Build a regex source string for the alternation of keywords, factored
+    by common prefix so the regex engine doesn't retry every alternative.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        # a keyword ending here means everything below is optional, but
+        # we only need to know that *some* keyword matched, so stop early
+        if "" in node:
+            return ""
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items())]
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Compiled matcher for a fixed list of keywords.
+    search() is the fast yes/no check, matches() returns the matched
+    keywords in the order they appear in the keyword list.
+    """
+
+    def __init__(self, keywords):
+        # keep the caller's order but drop duplicates and empty strings
+        self.keywords = list(dict.fromkeys(k for k in keywords if k))
+        if self.keywords:
+            self.pattern = re.compile(_trie_pattern(self.keywords))
+        else:
+            self.pattern = None
+        self._build_automaton()
+
+    def _build_automaton(self):
+        # goto[state] maps a character to the next state, fail[state] is
+        # the longest proper suffix state, out[state] holds keyword indexes
+        goto = [{}]
+        out = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                if char not in goto[state]:
+                    goto.append({})
+                    out.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            out[state].append(index)
+
+        # breadth-first, so a state's fail link is always set before its
+        # children's; states one character deep fail back to the root
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                queue.append(child)
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                if state:
+                    fail[child] = goto[f].get(char, 0)
+                out[child] = out[child] + out[fail[child]]
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def _join(self, texts):
+        if len(texts) == 1:
+            return texts[0]
+        return FIELD_SEPARATOR.join(texts)
+
+    def search(self, *texts):
+        """
+        True if any keyword occurs in any of the texts.
+        """
+        if self.pattern is None:
+            return False
+        return self.pattern.search(self._join(texts)) is not None
+
+    def matches(self, *texts):
+        """
+        List of keywords occurring in any of the texts, in keyword order.
+        Returns an empty list (without running the automaton) when
+        nothing matches.
+        """
+        if not self.search(*texts):
+            return []
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        found = set()
+        state = 0
+        for char in self._join(texts):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return [self.keywords[index] for index in sorted(found)]
+
+
+class RawPrefilter:
+    """
+    Cheap check on an undecoded dump line: False means no keyword can
+    match the record, so the line can be dropped without parsing it.
+
+    A keyword can only match the cleaned text if each of its runs of word
+    characters appears in the lowercased raw text, so the prefilter looks
+    for the longest run of every keyword in the ASCII-lowercased line.
+    It can let through lines that don't match (the run may be in another
+    field, or another word), but never drops one that does, short of the
+    odd non-ASCII letter that lowercases to an ASCII one (the Kelvin sign
+    to "k"). Keywords with non-ASCII letters can't be checked that way, so
+    any such keyword turns the prefilter off.
+    """
+
+    def __init__(self, keywords):
+        tokens = []
+        for keyword in filter(None, keywords):
+            runs = re.findall(r"[^\W_]+", keyword.lower())
+            if not runs or not all(run.isascii() for run in runs):
+                tokens = None
+                break
+            tokens.append(max(runs, key=len))
+        self.tokens = None
+        self.pattern = None
+        if not tokens:
+            return
+        tokens = sorted(set(tokens))
+        # a bytes substring search is much faster than a regex alternation
+        # for a few tokens, but each one is a separate scan of the line
+        if len(tokens) <= FIND_TOKENS_LIMIT:
+            self.tokens = [token.encode("ascii") for token in tokens]
+        else:
+            self.pattern = re.compile(_trie_pattern(tokens).encode("ascii"))
+
+    def may_match(self, line):
+        if self.tokens is not None:
+            line = line.lower()
+            for token in self.tokens:
+                if token in line:
+                    return True
+            return False
+        if self.pattern is not None:
+            return self.pattern.search(line.lower()) is not None
+        return True
+
+
+def keywords_from_file(filename):
+    """
+    Keywords listed one per line in filename. Spaces around a keyword are
+    kept, as they decide whether it matches part of a word; blank lines
+    and lines starting with # are skipped.
+    """
+    keywords = []
+    with open(filename, "r", encoding="UTF-8") as infile:
+        for line in infile:
+            keyword = line.rstrip("\r\n")
+            if keyword.strip() and not keyword.startswith("#"):
+                keywords.append(keyword)
+    return keywords
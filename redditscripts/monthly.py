@@ -0,0 +1,149 @@
+"""
+Monthly text and n-grams, from the filter stage's output.
+
+Writes the words of every submission and comment as a text blob per
+month, based on the UTC month of each submission (comments go with their
+submission's month, to avoid sparse data), and the 20 most frequent
+words, bigrams and trigrams of every month with their counts.
+reddit2csv3.py and `reddit2csv monthly` (redditscripts.cli) both run
+monthly_ngrams().
+
+With workers > 1 months are shared out to a process pool. Each worker
+reads its months from the reddit's SQLite store and writes their files
+itself, so only a month's name goes out and its row count comes back.
+The busiest months are started first, and results are collected in
+month order.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from redditscripts.instrument import RunReport
+from redditscripts.ngrams import NgramCounter, Vocabulary
+from redditscripts.store import CorpusStore, open_store, store_filename
+from redditscripts.text import load_stopwords, filter_tokens
+
+# left out of the word frequencies (but kept in the n-grams), along with
+# the keywords
+CUSTOM_STOPWORDS = ["breast", "breasts", "cancer", "chest", "surgeon", "surgery", "closure", "procedure", "reconstruction", "mastectomy", "boobs", "boobies", "boob", "implant", "implants"]
+
+TOP_NGRAMS = 20
+
+# (nltk stopwords, custom stopwords, sketch size, output dir) and open
+# stores of a worker process
+_worker_settings = None
+_worker_stores = {}
+
+
+def process_stopwords(items, nltk_stopwords):
+    """
+    Dedupe function, used to process stopwords: items in their first
+    order, without repeats or words already in nltk_stopwords.
+    """
+    seen = set()
+    result = []
+    for item in items:
+        if item not in seen and item not in nltk_stopwords:
+            seen.add(item)
+            result.append(item)
+    return result
+
+
+def write_month(store, reddit, month, nltk_stopwords, custom_stopwords, ngram_sketch_size=None, output_dir="./output"):
+    """
+    Write one month's text file and top n-grams, and return the number
+    of submissions and comments read.
+    """
+    rows = 0
+    # a vocabulary per month, so the results (even the approximate ones
+    # of a sketch) don't depend on which months were counted before
+    counts = NgramCounter(Vocabulary(), (1, 2, 3), ngram_sketch_size)
+    # the month's text file is written as the documents are read, only
+    # the counts are kept
+    with open(os.path.join(output_dir, "monthly", reddit+"_"+month+".txt"), "w", encoding="UTF-8") as outfile:
+        for title, selftext in store.submissions(["title", "selftext"], month):
+            rows += 1
+            words = re.findall(r'\w+', title+" "+selftext)
+            # only filter out nltk basic stopwords here, custom stopwords
+            # are left out of the word frequencies but kept for ngrams
+            counts.add(filter_tokens(words, nltk_stopwords))
+            words.append(" ")
+            outfile.write(" ".join(words))
+
+        # Use the submission month to avoid sparse data
+        for body, in store.comments(["body"], month):
+            rows += 1
+            words = re.findall(r'\w+', body)
+            counts.add(filter_tokens(words, nltk_stopwords))
+            words.append(" ")
+            outfile.write(" ".join(words))
+
+    frequency = counts.most_common(1, TOP_NGRAMS, exclude=custom_stopwords)
+    with open(os.path.join(output_dir, "monthly", "freq", reddit+"_"+month+".csv"), "w", encoding="UTF-8") as outfile:
+        outfile.writelines([word + ", " + str(count) + "\n" for (word,), count in frequency])
+    bigrams = counts.most_common(2, TOP_NGRAMS)
+    with open(os.path.join(output_dir, "monthly", "bigrams", reddit+"_"+month+"_bigrams.csv"), "w", encoding="UTF-8") as outfile:
+        outfile.writelines([" ".join(bigram) + ", " + str(count) + "\n" for bigram, count in bigrams])
+    trigrams = counts.most_common(3, TOP_NGRAMS)
+    with open(os.path.join(output_dir, "monthly", "trigrams", reddit+"_"+month+"_trigrams.csv"), "w", encoding="UTF-8") as outfile:
+        outfile.writelines([" ".join(trigram) + ", " + str(count) + "\n" for trigram, count in trigrams])
+    return rows
+
+
+def _start_worker(nltk_stopwords, custom_stopwords, ngram_sketch_size, output_dir):
+    global _worker_settings
+    _worker_settings = (nltk_stopwords, custom_stopwords, ngram_sketch_size, output_dir)
+
+
+def _write_month_in_worker(reddit, month):
+    nltk_stopwords, custom_stopwords, ngram_sketch_size, output_dir = _worker_settings
+    store = _worker_stores.get(reddit)
+    if store is None:
+        store = _worker_stores[reddit] = CorpusStore(store_filename(reddit, output_dir))
+    return write_month(store, reddit, month, nltk_stopwords, custom_stopwords, ngram_sketch_size, output_dir)
+
+
+def monthly_ngrams(reddits, custom_stopwords, stopword_languages=None, ngram_sketch_size=None, months=None,
+                   output_dir="./output", report=None, workers=1):
+    """
+    Write each reddit's monthly text and top n-grams under
+    <output_dir>/monthly. custom_stopwords are left out of the word
+    frequencies; ngram_sketch_size keeps at most that many n-grams of
+    each length per month, with approximate counts. months, a list like
+    ["2020-01"], limits the output to those months. With workers > 1,
+    that many processes work on different months at once.
+    """
+    if report is None:
+        report = RunReport("monthly")
+    for directory in ("monthly", "monthly/freq", "monthly/bigrams", "monthly/trigrams"):
+        os.makedirs(os.path.join(output_dir, directory), exist_ok=True)
+    with report.phase("stopwords"):
+        nltk_stopwords = load_stopwords(stopword_languages)
+    custom_stopwords = process_stopwords(custom_stopwords, nltk_stopwords)
+    print("Stopwords:", custom_stopwords)
+
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(workers, initializer=_start_worker,
+                                       initargs=(nltk_stopwords, custom_stopwords, ngram_sketch_size, output_dir))
+    try:
+        for reddit in reddits:
+            with open_store(reddit, output_dir) as store:
+                reddit_months = [month for month in store.months() if months is None or month in months]
+                with report.phase("months", len(reddit_months), "months") as phase:
+                    if executor is None:
+                        for month in reddit_months:
+                            rows = write_month(store, reddit, month, nltk_stopwords, custom_stopwords, ngram_sketch_size, output_dir)
+                            phase.advance(1, rows)
+                        continue
+                    # biggest months first, results in month order
+                    sizes = store.month_sizes()
+                    futures = {}
+                    for month in sorted(reddit_months, key=lambda month: -sizes.get(month, 0)):
+                        futures[month] = executor.submit(_write_month_in_worker, reddit, month)
+                    for month in reddit_months:
+                        phase.advance(1, futures[month].result())
+    finally:
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,140 @@
+"""
+Unigram, bigram and trigram counting for the monthly analysis.
+
+NgramCounter counts all three orders in one pass over each document's
+words, without materializing the n-grams:
+
+  * words are interned to int ids in a Vocabulary, and an n-gram is
+    packed into a single int (ID_BITS per word),
+  * in exact mode each order is a Counter, and the results match
+    nltk.FreqDist's, ties included,
+  * with sketch_size set, each order is a SpaceSaving summary that keeps
+    at most sketch_size n-grams, so memory is fixed however busy the
+    month is. Counts are then upper bounds, and any n-gram occurring in
+    more than 1/sketch_size of the positions is guaranteed to be kept.
+"""
+
+import heapq
+from collections import Counter
+from itertools import repeat
+from operator import itemgetter, lshift, or_
+
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+
+
+class Vocabulary:
+    """
+    Two-way mapping between words and int ids.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.words = []
+
+    def encode(self, words):
+        ids = self.ids
+        words = list(words)
+        # only the document's distinct words need a Python-level check
+        for word in dict.fromkeys(words):
+            if word not in ids:
+                ids[word] = len(self.words)
+                self.words.append(word)
+        return list(map(ids.__getitem__, words))
+
+    def decode(self, key, n):
+        """
+        Tuple of the n words packed into key.
+        """
+        return tuple(self.words[(key >> (ID_BITS * (n - 1 - position))) & ID_MASK] for position in range(n))
+
+
+def ngram_keys(ids, n):
+    """
+    Iterator over the packed keys of every n-gram in a list of word ids.
+    """
+    keys = iter(ids)
+    for position in range(1, n):
+        keys = map(or_, map(lshift, keys, repeat(ID_BITS)), ids[position:])
+    return keys
+
+
+class SpaceSaving:
+    """
+    Space-Saving top-K summary (Metwally et al.) over a stream of keys,
+    holding at most capacity counters. When a new key arrives and the
+    summary is full, the key with the smallest count is replaced and the
+    new key inherits that count plus one.
+
+    The heap holds one entry per key. Entries aren't updated when a
+    count goes up, so an entry's count can be lower than the key's real
+    count, and stale entries are fixed as they reach the top.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.heap = []
+
+    def update(self, keys):
+        counts = self.counts
+        heap = self.heap
+        for key in keys:
+            count = counts.get(key)
+            if count is not None:
+                counts[key] = count + 1
+            elif len(counts) < self.capacity:
+                counts[key] = 1
+                heapq.heappush(heap, (1, key))
+            else:
+                while heap[0][0] != counts[heap[0][1]]:
+                    smallest = heap[0][1]
+                    heapq.heapreplace(heap, (counts[smallest], smallest))
+                count, smallest = heap[0]
+                del counts[smallest]
+                counts[key] = count + 1
+                heapq.heapreplace(heap, (count + 1, key))
+
+    def items(self):
+        return self.counts.items()
+
+
+class NgramCounter:
+    """
+    Counts n-grams of each order in orders over a stream of words given
+    to add() a document at a time. The stream is treated as one sequence,
+    so n-grams run across the end of one document and the start of the
+    next.
+    """
+
+    def __init__(self, vocabulary, orders=(1, 2, 3), sketch_size=None):
+        self.vocabulary = vocabulary
+        if sketch_size:
+            self.counters = {n: SpaceSaving(sketch_size) for n in orders}
+        else:
+            self.counters = {n: Counter() for n in orders}
+        # ids of the last few words seen, to continue from
+        self.tail = []
+        self.tail_size = max(orders) - 1
+
+    def add(self, words):
+        ids = self.tail + self.vocabulary.encode(words)
+        carried = len(self.tail)
+        for n, counter in self.counters.items():
+            # start far enough back to finish the n-grams the previous
+            # document started, but not to count any of them again
+            counter.update(ngram_keys(ids[max(0, carried - n + 1):], n))
+        self.tail = ids[len(ids) - self.tail_size:] if self.tail_size else []
+
+    def most_common(self, n, count, exclude=None):
+        """
+        The count most common n-grams of order n as (words tuple, count)
+        pairs, skipping unigrams of the words in exclude. Ties keep the
+        order the n-grams were first seen in.
+        """
+        items = self.counters[n].items()
+        if exclude and n == 1:
+            excluded = {self.vocabulary.ids[word] for word in exclude if word in self.vocabulary.ids}
+            items = (item for item in items if item[0] not in excluded)
+        return [(self.vocabulary.decode(key, n), total) for key, total in heapq.nlargest(count, items, key=itemgetter(1))]
+
@@ -0,0 +1,270 @@
+"""
+Output files for the filter stage.
+
+Records go out as tuples in column order, a batch at a time, to any of:
+
+  * CsvRows, through csv.writer.writerows() into a large write buffer,
+  * JsonObjectRows, the {id: record} JSON object, byte-identical to
+    json.dump() of the dict of records,
+  * JsonLinesRows, one JSON object per line, which other tools can read
+    a record at a time, and
+  * ParquetRows, a Parquet file written a row group at a time, if
+    pyarrow is installed.
+
+With a WriterThread, batches are encoded and written on a background
+thread, fed through a bounded queue so they can't pile up in memory if
+the disk is slower than the parsing. Only the parts that release the GIL
+(the writes themselves, and Parquet's encoding and compression) really
+run alongside the parsing.
+"""
+
+import csv
+import json
+import queue
+import threading
+from itertools import islice
+
+from redditscripts.dates import parse_timestamp
+from redditscripts.streaming import JsonObjectWriter
+
+# bytes buffered by each output file before it's written to disk
+WRITE_BUFFER = 4 * 1024 * 1024
+
+# rows written, or handed to the writer thread, at a time
+BATCH_SIZE = 2000
+
+# batches waiting for the writer thread before adding more blocks
+QUEUE_SIZE = 16
+
+# rows per Parquet row group
+ROW_GROUP_SIZE = 100000
+
+EXTENSIONS = {"csv": ".csv", "json": ".json", "jsonl": ".jsonl", "parquet": ".parquet"}
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("writing Parquet files needs the pyarrow package (pip install pyarrow)")
+    return pyarrow
+
+
+class CsvRows:
+    """
+    CSV file with a header row of columns.
+    """
+
+    def __init__(self, filename, columns):
+        self.outfile = open(filename, "w", encoding="UTF-8", buffering=WRITE_BUFFER)
+        self.writer = csv.writer(self.outfile)
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.outfile.close()
+
+
+class JsonObjectRows:
+    """
+    JSON object of records keyed by their "id" column, as json.dump() of
+    a dict of record dicts writes it.
+    """
+
+    def __init__(self, filename, columns):
+        self.outfile = open(filename, "w", encoding="UTF-8", buffering=WRITE_BUFFER)
+        self.writer = JsonObjectWriter(self.outfile)
+        self.columns = columns
+        self.key = columns.index("id")
+
+    def write_rows(self, rows):
+        columns, key, write = self.columns, self.key, self.writer.write
+        for row in rows:
+            write(row[key], dict(zip(columns, row)))
+
+    def close(self):
+        self.writer.close()
+        self.outfile.close()
+
+
+class JsonLinesRows:
+    """
+    JSON Lines file, one record object per line.
+    """
+
+    def __init__(self, filename, columns):
+        self.outfile = open(filename, "w", encoding="UTF-8", buffering=WRITE_BUFFER)
+        self.columns = columns
+
+    def write_rows(self, rows):
+        columns = self.columns
+        self.outfile.write("".join([json.dumps(dict(zip(columns, row))) + "\n" for row in rows]))
+
+    def close(self):
+        self.outfile.close()
+
+
+class ParquetRows:
+    """
+    Parquet file. A Parquet column has one type, but the dumps' values
+    don't (created_utc is a string in some eras and an int in others), so
+    integer_columns are stored as int64 and everything else as strings.
+    """
+
+    def __init__(self, filename, columns, integer_columns=()):
+        self.pyarrow = import_pyarrow()
+        self.integer = [column in integer_columns for column in columns]
+        self.schema = self.pyarrow.schema([(column, self.pyarrow.int64() if integer else self.pyarrow.string())
+                                           for column, integer in zip(columns, self.integer)])
+        self.writer = self.pyarrow.parquet.ParquetWriter(filename, self.schema)
+        self.pending = []
+
+    def _write_row_group(self):
+        arrays = []
+        for values, integer, field in zip(zip(*self.pending), self.integer, self.schema):
+            if integer:
+                values = [None if value is None else parse_timestamp(value) for value in values]
+            else:
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(self.pyarrow.array(values, type=field.type))
+        self.writer.write_table(self.pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        self.pending = []
+
+    def write_rows(self, rows):
+        self.pending.extend(rows)
+        if len(self.pending) >= ROW_GROUP_SIZE:
+            self._write_row_group()
+
+    def close(self):
+        if self.pending:
+            self._write_row_group()
+        self.writer.close()
+
+
+class WriterThread:
+    """
+    Background thread calling write_rows() and close() on row writers, in
+    the order they're queued. An error in the thread is raised in the
+    caller by the next call, or by close().
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue = queue.Queue(queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="output writer", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            task = self.queue.get()
+            if task is None:
+                return
+            writer, rows = task
+            if self.error is not None:
+                # keep taking tasks, so the caller never blocks on a full queue
+                continue
+            try:
+                if rows is None:
+                    writer.close()
+                else:
+                    writer.write_rows(rows)
+            except BaseException as error:
+                self.error = error
+
+    def _check(self):
+        if self.error is not None:
+            raise self.error
+
+    def write_rows(self, writer, rows):
+        self._check()
+        self.queue.put((writer, rows))
+
+    def close_writer(self, writer):
+        self._check()
+        self.queue.put((writer, None))
+
+    def close(self):
+        """
+        Wait for everything queued to be written.
+        """
+        self.queue.put(None)
+        self.thread.join()
+        self._check()
+
+
+class BatchedRows:
+    """
+    Collects rows for one writer into batches of batch_size and writes
+    each batch, through thread (a WriterThread) if given.
+    """
+
+    def __init__(self, writer, thread=None, batch_size=BATCH_SIZE):
+        self.writer = writer
+        self.thread = thread
+        self.batch_size = batch_size
+        self.batch = []
+
+    def _flush(self):
+        if self.batch:
+            if self.thread is None:
+                self.writer.write_rows(self.batch)
+            else:
+                self.thread.write_rows(self.writer, self.batch)
+            self.batch = []
+
+    def write(self, row):
+        self.batch.append(row)
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def write_rows(self, rows):
+        rows = iter(rows)
+        while True:
+            self.batch.extend(islice(rows, self.batch_size - len(self.batch)))
+            if len(self.batch) < self.batch_size:
+                return
+            self._flush()
+
+    def close(self):
+        self._flush()
+        if self.thread is None:
+            self.writer.close()
+        else:
+            self.thread.close_writer(self.writer)
+
+
+def open_rows(kind, name, columns, thread=None, integer_columns=()):
+    """
+    BatchedRows writing rows of columns to name plus the extension for
+    kind ("csv", "json", "jsonl" or "parquet"). integer_columns are the
+    ones stored as integers in Parquet files.
+    """
+    filename = name + EXTENSIONS[kind]
+    if kind == "csv":
+        writer = CsvRows(filename, columns)
+    elif kind == "json":
+        writer = JsonObjectRows(filename, columns)
+    elif kind == "jsonl":
+        writer = JsonLinesRows(filename, columns)
+    elif kind == "parquet":
+        writer = ParquetRows(filename, columns, integer_columns)
+    else:
+        raise ValueError("unknown output format %r, expected one of %s" % (kind, ", ".join(EXTENSIONS)))
+    return BatchedRows(writer, thread)
+
+
+def write_rows(writers, rows, batch_size=BATCH_SIZE):
+    """
+    Write the same rows to each of writers, reading them batch_size at a
+    time, so rows can be an iterator too large to hold in memory.
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        for writer in writers:
+            writer.write_rows(batch)
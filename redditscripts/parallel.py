@@ -0,0 +1,169 @@
+"""
+Parallel line processing for the jsonl dumps.
+
+map_lines() splits a file into byte ranges that start and end on line
+boundaries, runs a function over every line of each range in a process
+pool, and yields the results in file order. The comment pass relies on
+parents coming before their replies, so results are never reordered: a
+chunk's results are only yielded once every earlier chunk's have been.
+
+Compressed dumps can't be split by byte offset, so they are decompressed
+in the main process and the workers are handed batches of lines instead.
+
+Only a few chunks are in flight at once, so memory stays bounded however
+large the file is.
+
+A byte range of the file can be given instead of the whole file, and each
+result can come with the offset of its line, which is what incremental
+runs use to pick up where the last one stopped.
+
+Workers are forked so they inherit the calling script's globals (the
+compiled keyword matcher, column lists and so on) and functions defined
+in the script can be passed to them. Where fork isn't available the lines
+are processed serially instead.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from redditscripts.dumps import is_compressed, open_dump
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def chunk_ranges(filename, chunk_size=CHUNK_SIZE, start=0, end=None):
+    """
+    List of (start, end) byte offsets covering the file (or its bytes from
+    start to end, both on line boundaries), each roughly chunk_size long
+    and ending just after a newline (or at the end).
+    """
+    size = os.path.getsize(filename) if end is None else end
+    ranges = []
+    with open(filename, "rb") as infile:
+        while start < size:
+            infile.seek(start + chunk_size - 1)
+            infile.readline()
+            end = min(infile.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _map_range(filename, start, end, function, offsets):
+    results = []
+    lines = 0
+    with open(filename, "rb") as infile:
+        infile.seek(start)
+        position = start
+        while position < end:
+            line = infile.readline()
+            if not line:
+                break
+            lines += 1
+            result = function(line)
+            if result is not None:
+                results.append((position, result) if offsets else result)
+            position += len(line)
+    return lines, results
+
+
+def line_batches(filename, chunk_size=CHUNK_SIZE, start=0, end=None):
+    """
+    (offset, lines) batches from a (possibly compressed) dump, each about
+    chunk_size bytes long, offset being where the first line starts.
+    """
+    with open_dump(filename, start) as infile:
+        batch = []
+        size = 0
+        for line in infile:
+            if end is not None and start + size >= end:
+                break
+            batch.append(line)
+            size += len(line)
+            if size >= chunk_size:
+                yield start, batch
+                start += size
+                batch = []
+                size = 0
+        if batch:
+            yield start, batch
+
+
+def _map_batch(start, lines, function, offsets):
+    results = []
+    position = start
+    for line in lines:
+        result = function(line)
+        if result is not None:
+            results.append((position, result) if offsets else result)
+        position += len(line)
+    return len(lines), results
+
+
+def can_fork():
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def map_lines(filename, function, workers=1, chunk_size=CHUNK_SIZE, start=0, end=None, offsets=False, progress=None):
+    """
+    Yield function(line) for each line of filename, in file order,
+    skipping None results. Lines are bytes, including the trailing
+    newline, exactly as iterating over the file in binary mode gives
+    them (after decompression for compressed dumps). With workers > 1
+    the lines are processed in that many forked processes.
+
+    start and end (byte offsets on line boundaries, in the decompressed
+    data for compressed dumps) limit the lines to that part of the file.
+    With offsets, (offset, result) pairs are yielded instead, offset
+    being where the result's line starts.
+
+    progress, if given, is called as progress(bytes, lines) after about
+    every chunk_size bytes read.
+    """
+    if workers <= 1 or not can_fork():
+        with open_dump(filename, start) as infile:
+            position = start
+            reported = start
+            lines = 0
+            for line in infile:
+                if end is not None and position >= end:
+                    break
+                result = function(line)
+                if result is not None:
+                    yield (position, result) if offsets else result
+                position += len(line)
+                lines += 1
+                if progress is not None and position - reported >= chunk_size:
+                    progress(position - reported, lines)
+                    reported = position
+                    lines = 0
+            if progress is not None and lines:
+                progress(position - reported, lines)
+        return
+
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = deque()
+        if is_compressed(filename):
+            batches = line_batches(filename, chunk_size, start, end)
+            tasks = (((_map_batch, offset, lines, function, offsets), sum(map(len, lines))) for offset, lines in batches)
+        else:
+            ranges = chunk_ranges(filename, chunk_size, start, end)
+            tasks = (((_map_range, filename, first, last, function, offsets), last - first) for first, last in ranges)
+
+        def finished():
+            future, size = pending.popleft()
+            lines, results = future.result()
+            if progress is not None:
+                progress(size, lines)
+            return results
+
+        for task, size in tasks:
+            pending.append((executor.submit(*task), size))
+            # keep every worker busy, with one chunk each queued behind
+            if len(pending) >= workers * 2:
+                yield from finished()
+        while pending:
+            yield from finished()
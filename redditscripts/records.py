@@ -0,0 +1,69 @@
+"""
+Compact records for the matched submissions and comments.
+
+Submission and Comment are named tuples of the fields read from the
+dumps:
+
+  * type is a class attribute, not stored per record,
+  * permalink_path is stored without the https://www.reddit.com prefix;
+    the permalink property adds it back,
+  * comments don't store submission_title; row_getter() looks it up by
+    submission_id when rows are written, and
+  * the subreddit and author strings are interned.
+
+row_getter() turns a list of output columns into a function building a
+record's row tuple.
+"""
+
+import sys
+from collections import namedtuple
+from operator import attrgetter
+
+PERMALINK_PREFIX = "https://www.reddit.com"
+
+# written as the permalink of comments from eras with none
+MISSING_PERMALINK = "NONE"
+
+intern = sys.intern
+
+
+class Submission(namedtuple("Submission", ["subreddit", "title", "author", "score", "selftext", "url", "id",
+                                           "permalink_path", "created_utc", "date", "month", "matched_keywords"])):
+    __slots__ = ()
+    type = "submission"
+
+    @property
+    def permalink(self):
+        return PERMALINK_PREFIX + self.permalink_path
+
+
+class Comment(namedtuple("Comment", ["subreddit", "author", "score", "body", "id", "parent_id", "submission_id",
+                                     "permalink_path", "created_utc", "date", "month"])):
+    __slots__ = ()
+    type = "comment"
+
+    @property
+    def permalink(self):
+        if self.permalink_path is None:
+            # sometimes (maybe because of older API versions) there aren't permalinks
+            return MISSING_PERMALINK
+        return PERMALINK_PREFIX + self.permalink_path
+
+
+def row_getter(columns, titles=None):
+    """
+    Function giving the values of columns for a record, as a tuple.
+    submission_title is looked up in titles, a {submission id: title}
+    dict, by the record's submission_id.
+    """
+    if "submission_title" not in columns:
+        getter = attrgetter(*columns)
+        return getter if len(columns) > 1 else lambda record: (getter(record),)
+    index = columns.index("submission_title")
+    getter = attrgetter(*["submission_id" if column == "submission_title" else column for column in columns])
+
+    def row(record):
+        values = list(getter(record)) if len(columns) > 1 else [getter(record)]
+        values[index] = titles[values[index]]
+        return tuple(values)
+    return row
@@ -0,0 +1,232 @@
+"""
+SQLite store for the filtered corpus.
+
+CorpusStore keeps the matched submissions and comments in an SQLite
+database (one per reddit, next to the CSV output). Stage 1 adds rows as
+it finds them, and the analysis scripts read only the columns and months
+they need, through the indexes on month and submission_id.
+
+Rows come back in the order of the dumps. That's the order they were
+added in, unless they were given their line's byte offset as a position,
+which incremental runs do because they add older records after newer
+ones. The store also keeps the checkpoint those runs resume from.
+
+Columns are created from the scripts' column lists without a declared
+type, so values keep the type they had in the dump (created_utc is a
+string in some eras and an int in others).
+"""
+
+import json
+import os
+import sqlite3
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def store_filename(reddit, output_dir="./output"):
+    return os.path.join(output_dir, reddit + ".sqlite")
+
+
+class CorpusStore:
+    """
+    Matched submissions and comments of one reddit. Use as a context
+    manager, or call close(), to commit what's been added; leaving the
+    with block with an exception rolls back instead. With replace, the
+    store is built from scratch in filename.tmp, which only replaces
+    filename when it's closed, so a run that fails part way leaves the
+    store that was there before.
+    """
+
+    def __init__(self, filename, replace=False):
+        self.filename = filename
+        self.path = filename + ".tmp" if replace else filename
+        if replace and os.path.exists(self.path):
+            # left by a run that was killed
+            os.remove(self.path)
+        self.connection = sqlite3.connect(self.path)
+        self._inserts = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+        if self.path != self.filename:
+            os.replace(self.path, self.filename)
+
+    def abort(self):
+        """
+        Close without keeping anything added since the last commit.
+        """
+        self.connection.rollback()
+        self.connection.close()
+        if self.path != self.filename:
+            os.remove(self.path)
+
+    def create(self, submission_columns, comment_columns):
+        """
+        Replace anything in the store with empty submissions and comments
+        tables, and no checkpoint. Both need an "id" column, submissions a
+        "month" column and comments a "submission_id" column.
+        """
+        # sqlite3 only opens a transaction by itself for changes to rows,
+        # so start one for the tables to be replaced in too
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN")
+        for table, columns in (("submissions", submission_columns), ("comments", comment_columns)):
+            self.connection.execute("DROP TABLE IF EXISTS " + table)
+            definitions = [_quote(column) + (" PRIMARY KEY" if column == "id" else "") for column in columns]
+            definitions.append("position INTEGER")
+            self.connection.execute("CREATE TABLE " + table + " (" + ", ".join(definitions) + ")")
+            self._prepare(table, columns)
+        self.connection.execute("CREATE INDEX submissions_month ON submissions (month)")
+        self.connection.execute("CREATE INDEX comments_submission_id ON comments (submission_id)")
+        self.connection.execute("DROP TABLE IF EXISTS checkpoint")
+        self.connection.execute("CREATE TABLE checkpoint (value TEXT)")
+
+    def _prepare(self, table, columns):
+        # a new submission with an id already seen replaces the old one in
+        # place (keeping its position), like assigning to a dict key
+        updates = [_quote(column) + " = excluded." + _quote(column) for column in columns if column != "id"]
+        self._inserts[table] = (
+            "INSERT INTO " + table + " (" + ", ".join(_quote(column) for column in columns) + ", position)"
+            " VALUES (" + ", ".join("?" * (len(columns) + 1)) + ")"
+            " ON CONFLICT(id) DO " + ("UPDATE SET " + ", ".join(updates) if updates else "NOTHING"),
+            columns)
+
+    def _insert(self, table):
+        if table not in self._inserts:
+            # a store made by an earlier run, being added to
+            columns = [column for _, column, *_ in self.connection.execute("PRAGMA table_info(" + table + ")")]
+            self._prepare(table, [column for column in columns if column != "position"])
+        return self._inserts[table]
+
+    def _add(self, table, record, position):
+        statement, columns = self._insert(table)
+        values = [record.get(column) for column in columns]
+        values.append(position)
+        self.connection.execute(statement, values)
+
+    def _add_row(self, table, row, position):
+        statement, columns = self._insert(table)
+        self.connection.execute(statement, (*row, position))
+
+    def add_submission(self, submission, position=None):
+        self._add("submissions", submission, position)
+
+    def add_comment(self, comment, position=None):
+        self._add("comments", comment, position)
+
+    def add_submission_row(self, row, position=None):
+        """
+        Add a submission given as a tuple of the values of the table's
+        columns, in the order they were passed to create().
+        """
+        self._add_row("submissions", row, position)
+
+    def add_comment_row(self, row, position=None):
+        self._add_row("comments", row, position)
+
+    def checkpoint(self):
+        """
+        The checkpoint last saved with set_checkpoint(), or None.
+        """
+        try:
+            row = self.connection.execute("SELECT value FROM checkpoint").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return None if row is None else json.loads(row[0])
+
+    def set_checkpoint(self, checkpoint):
+        self.connection.execute("DELETE FROM checkpoint")
+        self.connection.execute("INSERT INTO checkpoint VALUES (?)", (json.dumps(checkpoint),))
+
+    def counts(self):
+        """
+        Number of submissions and of comments in the store.
+        """
+        return tuple(self.connection.execute("SELECT COUNT(*) FROM " + table).fetchone()[0]
+                     for table in ("submissions", "comments"))
+
+    def months(self):
+        """
+        Submission months, in the order they first appear.
+        """
+        cursor = self.connection.execute("SELECT month FROM submissions GROUP BY month ORDER BY MIN(position), MIN(rowid)")
+        return [month for month, in cursor]
+
+    def month_sizes(self):
+        """
+        {month: number of submissions and comments}, comments counting
+        towards their submission's month.
+        """
+        sizes = dict(self.connection.execute("SELECT month, COUNT(*) FROM submissions GROUP BY month"))
+        cursor = self.connection.execute("SELECT s.month, COUNT(*) FROM comments c JOIN submissions s ON s.id = c.submission_id GROUP BY s.month")
+        for month, count in cursor:
+            sizes[month] = sizes.get(month, 0) + count
+        return sizes
+
+    def submissions(self, columns, month=None):
+        """
+        Iterator of tuples of the given columns for each submission, or
+        each submission from month.
+        """
+        select = "SELECT " + ", ".join(_quote(column) for column in columns) + " FROM submissions"
+        if month is None:
+            return self.connection.execute(select + " ORDER BY position, rowid")
+        return self.connection.execute(select + " WHERE month = ? ORDER BY position, rowid", (month,))
+
+    def comments(self, columns, month=None, by_parent=False):
+        """
+        Iterator of tuples of the given columns for each comment, or each
+        comment on a submission from month. "submission_month" can be
+        asked for as a column. by_parent groups replies to the same
+        parent together, in order of each parent's first reply, like the
+        comments CSV.
+        """
+        fields = ["s.month" if column == "submission_month" else "c." + _quote(column) for column in columns]
+        select = "SELECT " + ", ".join(fields) + " FROM comments c JOIN submissions s ON s.id = c.submission_id"
+        where, parameters = ("", ()) if month is None else (" WHERE s.month = ?", (month,))
+        if by_parent:
+            order = " WINDOW parent AS (PARTITION BY c.parent_id)" \
+                " ORDER BY MIN(c.position) OVER parent, MIN(c.rowid) OVER parent, c.position, c.rowid"
+        else:
+            order = " ORDER BY c.position, c.rowid"
+        return self.connection.execute(select + where + order, parameters)
+
+
+def _columns(records, required):
+    columns = dict.fromkeys(required)
+    for record in records.values():
+        columns.update(dict.fromkeys(record))
+    return list(columns)
+
+
+def open_store(reddit, output_dir="./output"):
+    """
+    Open a reddit's store. Output from before the store existed is
+    converted from the reddit's JSON files the first time.
+    """
+    filename = store_filename(reddit, output_dir)
+    if os.path.exists(filename):
+        return CorpusStore(filename)
+    with open(os.path.join(output_dir, reddit + "_submissions.json"), "r", encoding="UTF-8") as jsonfile:
+        submissions = json.load(jsonfile)
+    with open(os.path.join(output_dir, reddit + "_comments.json"), "r", encoding="UTF-8") as jsonfile:
+        comments = json.load(jsonfile)
+    with CorpusStore(filename, replace=True) as store:
+        store.create(_columns(submissions, ["id", "month"]), _columns(comments, ["id", "submission_id"]))
+        for submission in submissions.values():
+            store.add_submission(submission)
+        for comment in comments.values():
+            store.add_comment(comment)
+    return CorpusStore(filename)
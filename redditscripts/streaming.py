@@ -0,0 +1,86 @@
+"""
+Helpers for the streaming comment pass.
+
+The default comment pass keeps every matched comment (twice) until the
+whole comments file has been read. In streaming mode each matched comment
+is written out as soon as it's seen, and the only per-comment state kept
+is the compact comment -> submission map in redditscripts.ids.
+
+Writing comments grouped by thread (the order the non-streaming CSV uses)
+needs to see every comment first, so that is done with an external merge
+sort over temporary files rather than in memory.
+"""
+
+import heapq
+import json
+import pickle
+import tempfile
+
+
+class JsonObjectWriter:
+    """
+    Writes a JSON object one key at a time. The output is byte-identical to
+    json.dump() of the equivalent dict, so the analysis scripts can read it
+    with json.load() as before.
+    """
+
+    def __init__(self, outfile):
+        self.outfile = outfile
+        self.started = False
+
+    def write(self, key, value):
+        self.outfile.write(", " if self.started else "{")
+        self.started = True
+        self.outfile.write(json.dumps(key) + ": " + json.dumps(value))
+
+    def close(self):
+        self.outfile.write("}" if self.started else "{}")
+
+
+class ExternalSorter:
+    """
+    Sorts (key, row) pairs that may not fit in memory. Rows are buffered up
+    to chunk_size, sorted, and spilled to temporary files, then merged
+    lazily by sorted_rows(). Keys must be unique so rows never need to be
+    compared.
+    """
+
+    def __init__(self, chunk_size=100000, tmpdir=None):
+        self.chunk_size = chunk_size
+        self.tmpdir = tmpdir
+        self.buffer = []
+        self.chunks = []
+
+    def add(self, key, row):
+        self.buffer.append((key, row))
+        if len(self.buffer) >= self.chunk_size:
+            self._spill()
+
+    def _spill(self):
+        self.buffer.sort(key=lambda item: item[0])
+        chunk = tempfile.TemporaryFile(dir=self.tmpdir)
+        for item in self.buffer:
+            pickle.dump(item, chunk, pickle.HIGHEST_PROTOCOL)
+        chunk.seek(0)
+        self.chunks.append(chunk)
+        self.buffer = []
+
+    def _read_chunk(self, chunk):
+        while True:
+            try:
+                yield pickle.load(chunk)
+            except EOFError:
+                chunk.close()
+                return
+
+    def sorted_rows(self):
+        """
+        Yield rows in key order. The sorter can't be reused afterwards.
+        """
+        self.buffer.sort(key=lambda item: item[0])
+        sources = [self._read_chunk(chunk) for chunk in self.chunks]
+        sources.append(iter(self.buffer))
+        for key, row in heapq.merge(*sources, key=lambda item: item[0]):
+            yield row
+        self.buffer = []
+        self.chunks = []
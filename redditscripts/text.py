@@ -0,0 +1,141 @@
+"""
+Stopwords and token filtering for the analysis scripts.
+
+Stopwords are loaded once per run into a frozenset, and cached on disk
+so later runs don't need to load nltk for them at all. The cache is
+keyed on the languages asked for and nltk's data search path, and is
+only used while the stopwords corpus nltk would load is still the one
+it was built from, with the same modification times.
+"""
+
+import json
+import os
+import sys
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "redditscripts")
+
+_loaded = {}
+
+
+def _data_path():
+    """
+    The directories nltk.data.path lists, worked out the way nltk does
+    it, so the cache can be checked without importing nltk.
+    """
+    paths = [os.path.expanduser(path) for path in os.environ.get("NLTK_DATA", "").split(os.pathsep) if path]
+    if "APPENGINE_RUNTIME" not in os.environ and os.path.expanduser("~/") != "~/":
+        paths.append(os.path.expanduser("~/nltk_data"))
+    paths += [os.path.join(sys.prefix, "nltk_data"), os.path.join(sys.prefix, "share", "nltk_data"), os.path.join(sys.prefix, "lib", "nltk_data")]
+    if os.name == "nt":
+        paths += [os.path.join(os.environ.get("APPDATA", "C:\\"), "nltk_data"), r"C:\nltk_data", r"D:\nltk_data", r"E:\nltk_data"]
+    else:
+        paths += ["/usr/share/nltk_data", "/usr/local/share/nltk_data", "/usr/lib/nltk_data", "/usr/local/lib/nltk_data"]
+    return paths
+
+
+def _find_corpus(data_path):
+    """
+    Path of the stopwords corpus nltk would load from data_path: the
+    first corpora/stopwords.zip if there is one (nltk looks for the zip
+    file first), otherwise the first corpora/stopwords directory.
+    """
+    for name in ("stopwords.zip", "stopwords"):
+        for directory in data_path:
+            path = os.path.join(directory, "corpora", name)
+            if os.path.exists(path):
+                return os.path.abspath(path)
+    return None
+
+
+def _corpus_path(corpus):
+    from nltk.data import FileSystemPathPointer
+
+    if isinstance(corpus.root, FileSystemPathPointer):
+        return os.path.abspath(corpus.root.path)
+    return os.path.abspath(corpus.root.zipfile.filename)
+
+
+def _source_paths(corpus, fileids, all_languages):
+    from nltk.data import FileSystemPathPointer
+
+    paths = set()
+    if all_languages and isinstance(corpus.root, FileSystemPathPointer):
+        # the directory's mtime changes when a language is added
+        paths.add(corpus.root.path)
+    for fileid in fileids:
+        pointer = corpus.abspath(fileid)
+        if isinstance(pointer, FileSystemPathPointer):
+            paths.add(pointer.path)
+        else:
+            # the corpus is still zipped
+            paths.add(pointer.zipfile.filename)
+    return sorted(paths)
+
+
+def _cache_filename(languages, cache_dir):
+    name = "-".join(languages) if languages else "all"
+    return os.path.join(cache_dir, "stopwords-" + name + ".json")
+
+
+def _read_cache(cache_filename):
+    try:
+        with open(cache_filename, "r", encoding="UTF-8") as cachefile:
+            cache = json.load(cachefile)
+        data_path = _data_path()
+        # the cache is stale if nltk would now look somewhere else first
+        if cache["data_path"] != data_path or _find_corpus(data_path) != cache["corpus"]:
+            return None
+        for path, mtime in cache["sources"].items():
+            if os.path.getmtime(path) != mtime:
+                return None
+        return frozenset(cache["words"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_cache(cache_filename, words, sources, corpus):
+    try:
+        os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+        cache = {"data_path": _data_path(), "corpus": corpus,
+                 "sources": {path: os.path.getmtime(path) for path in sources}, "words": sorted(words)}
+        # write then rename, so a run that's killed can't leave half a cache
+        with open(cache_filename + ".tmp", "w", encoding="UTF-8") as cachefile:
+            json.dump(cache, cachefile)
+        os.replace(cache_filename + ".tmp", cache_filename)
+    except OSError:
+        # the cache only saves time, so carry on without it
+        pass
+
+
+def load_stopwords(languages=None, cache_dir=CACHE_DIR):
+    """
+    frozenset of the nltk stopwords for languages (a list of names like
+    "english"), or for every language nltk has when languages is None,
+    the same words stopwords.words() returns. Pass cache_dir=None to
+    skip the disk cache.
+    """
+    key = tuple(sorted(languages)) if languages else None
+    if key in _loaded:
+        return _loaded[key]
+    cache_filename = _cache_filename(key, cache_dir) if cache_dir else None
+    words = _read_cache(cache_filename) if cache_filename else None
+    if words is None:
+        from nltk.corpus import stopwords
+
+        fileids = list(key) if key else stopwords.fileids()
+        words = frozenset(stopwords.words(fileids))
+        if cache_filename:
+            _write_cache(cache_filename, words, _source_paths(stopwords, fileids, key is None), _corpus_path(stopwords))
+    _loaded[key] = words
+    return words
+
+
+def filter_tokens(tokens, stopwords):
+    """
+    Yield each token lowercased, skipping those in stopwords (a set of
+    lowercase words).
+    """
+    for token in tokens:
+        token = token.lower()
+        if token not in stopwords:
+            yield token
@@ -0,0 +1,111 @@
+import json
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+from benchmarks.corpus import KEYWORDS, generate
+from redditscripts.checkpoints import dump_state, make_checkpoint, plan_update
+from redditscripts.filtering import Filter
+from redditscripts.instrument import RunReport
+
+
+def run_filter(input_dir, output_dir, keywords=KEYWORDS, **settings):
+    settings.setdefault("report", RunReport("filter"))
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        Filter(keywords, output_dir=output_dir, **settings).run(["breastcancer"], input_dir=input_dir)
+
+
+def read_output(output_dir):
+    output = {}
+    for name in sorted(os.listdir(output_dir)):
+        if not name.endswith((".sqlite", "_report.json")):
+            with open(os.path.join(output_dir, name), "rb") as infile:
+                output[name] = infile.read()
+    return output
+
+
+def test_utc_offset_changed(tmp_path):
+    submissions_filename, comments_filename = generate(str(tmp_path), 300, hit_rate=0.3)
+    states = {"submissions": dump_state(submissions_filename), "comments": dump_state(comments_filename)}
+    columns = [["id", "month"], ["id", "submission_id"]]
+    checkpoint = make_checkpoint(KEYWORDS, columns, states)
+    assert plan_update(checkpoint, KEYWORDS, columns, states) is not None
+    assert plan_update(checkpoint, KEYWORDS, columns, states, -12) is None
+    # checkpoints saved without an offset
+    del checkpoint["utc_offset"]
+    assert plan_update(checkpoint, KEYWORDS, columns, states) is None
+
+
+def test_incremental_utc_offset_changed(tmp_path):
+    input_dir = str(tmp_path)
+    generate(input_dir, 300, hit_rate=0.3)
+    run_filter(input_dir, str(tmp_path / "incremental"), incremental=True)
+    run_filter(input_dir, str(tmp_path / "incremental"), incremental=True, utc_offset=-12)
+    run_filter(input_dir, str(tmp_path / "full"), utc_offset=-12)
+    assert read_output(str(tmp_path / "incremental")) == read_output(str(tmp_path / "full"))
+
+
+def split_corpus(tmp_path):
+    """
+    Synthetic dumps in tmp_path/corpus, and in tmp_path/input the lines
+    of both posted before a time 60% of the way through the submissions,
+    as they'd have been dumped then. Returns the two directories.
+    """
+    corpus_dir, input_dir = str(tmp_path / "corpus"), str(tmp_path / "input")
+    os.makedirs(input_dir)
+    filenames = generate(corpus_dir, 600, hit_rate=0.3)
+    with open(filenames[0], "rb") as infile:
+        lines = list(infile)
+    cutoff = int(json.loads(lines[len(lines) * 6 // 10])["created_utc"])
+    for filename in filenames:
+        with open(filename, "rb") as infile, open(os.path.join(input_dir, os.path.basename(filename)), "wb") as outfile:
+            for line in infile:
+                if int(json.loads(line)["created_utc"]) >= cutoff:
+                    break
+                outfile.write(line)
+    return corpus_dir, input_dir
+
+
+def append_rest(corpus_dir, input_dir):
+    for name in os.listdir(corpus_dir):
+        with open(os.path.join(corpus_dir, name), "rb") as infile:
+            data = infile.read()
+        with open(os.path.join(input_dir, name), "r+b") as outfile:
+            outfile.seek(0, os.SEEK_END)
+            outfile.write(data[outfile.tell():])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_incremental_append(tmp_path, workers):
+    corpus_dir, input_dir = split_corpus(tmp_path)
+    output_dir = str(tmp_path / "incremental")
+    run_filter(input_dir, output_dir, incremental=True, workers=workers)
+    append_rest(corpus_dir, input_dir)
+    run_filter(input_dir, output_dir, incremental=True, workers=workers)
+    run_filter(corpus_dir, str(tmp_path / "full"))
+    assert read_output(output_dir) == read_output(str(tmp_path / "full"))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_incremental_new_keywords(tmp_path, workers):
+    input_dir = str(tmp_path)
+    generate(input_dir, 600, hit_rate=0.3)
+    output_dir = str(tmp_path / "incremental")
+    run_filter(input_dir, output_dir, KEYWORDS[::2], incremental=True, workers=workers)
+    run_filter(input_dir, output_dir, incremental=True, workers=workers)
+    run_filter(input_dir, str(tmp_path / "full"))
+    assert read_output(output_dir) == read_output(str(tmp_path / "full"))
+
+
+@pytest.mark.parametrize("stream_comments", [False, True])
+def test_incremental_append_and_new_keywords(tmp_path, stream_comments):
+    corpus_dir, input_dir = split_corpus(tmp_path)
+    output_dir = str(tmp_path / "incremental")
+    run_filter(input_dir, output_dir, KEYWORDS[::2], incremental=True)
+    append_rest(corpus_dir, input_dir)
+    run_filter(input_dir, output_dir, incremental=True, stream_comments=stream_comments)
+    # nothing new: nothing to read, and the output stays the same
+    run_filter(input_dir, output_dir, incremental=True, stream_comments=stream_comments)
+    run_filter(corpus_dir, str(tmp_path / "full"), stream_comments=stream_comments)
+    assert read_output(output_dir) == read_output(str(tmp_path / "full"))
@@ -0,0 +1,47 @@
+import json
+import os
+from contextlib import redirect_stdout
+
+import pytest
+
+from redditscripts.decoding import BACKENDS, COMMENT_FIELDS, THREAD_FIELDS, available_backend, make_decoder
+from redditscripts.filtering import Filter
+from redditscripts.instrument import RunReport
+
+# a comment whose body ends in half an emoji
+LONE_SURROGATE = r'{"subreddit": "breastcancer", "author": "a", "score": 1, "body": "cut off \ud83d", "id": "c2", "parent_id": "t3_other", "link_id": "t3_other", "created_utc": 1600000000}'
+
+
+def backends():
+    installed = []
+    for backend in BACKENDS:
+        try:
+            make_decoder(THREAD_FIELDS, backend)
+        except ImportError:
+            continue
+        installed.append(backend)
+    return installed
+
+
+@pytest.mark.parametrize("backend", backends())
+@pytest.mark.parametrize("fields", [COMMENT_FIELDS, THREAD_FIELDS])
+@pytest.mark.parametrize("line", [LONE_SURROGATE, LONE_SURROGATE.encode("UTF-8")])
+def test_lone_surrogate(backend, fields, line):
+    j = make_decoder(fields, backend)(line)
+    expected = json.loads(line)
+    assert {field: j[field] for field in fields if field in j} == {field: expected[field] for field in fields if field in expected}
+
+
+def test_lone_surrogate_in_dump(tmp_path):
+    submission = {"subreddit": "breastcancer", "title": "going flat", "selftext": "", "author": "a", "score": 1,
+                  "url": "u", "id": "s1", "permalink": "/r/breastcancer/comments/s1/", "created_utc": 1600000000}
+    comment = {"subreddit": "breastcancer", "author": "b", "score": 1, "body": "a reply", "id": "c1",
+               "parent_id": "t3_s1", "link_id": "t3_s1", "permalink": "/r/breastcancer/comments/s1/_/c1/", "created_utc": 1600000100}
+    (tmp_path / "breastcancer_submissions").write_text(json.dumps(submission) + "\n", encoding="UTF-8")
+    (tmp_path / "breastcancer_comments").write_text(LONE_SURROGATE + "\n" + json.dumps(comment) + "\n", encoding="UTF-8")
+    output_dir = str(tmp_path / "output")
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        Filter([" going flat"], json_backend=available_backend(), output_dir=output_dir,
+               report=RunReport("filter")).run(["breastcancer"], input_dir=str(tmp_path))
+    with open(os.path.join(output_dir, "breastcancer_comments.json"), encoding="UTF-8") as infile:
+        assert list(json.load(infile)) == ["t1_c1"]
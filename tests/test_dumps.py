@@ -0,0 +1,90 @@
+import bz2
+import gzip
+
+import pytest
+
+from benchmarks.corpus import generate
+from redditscripts.dumps import find_dump, open_dump
+from redditscripts.parallel import map_lines
+
+CHUNK_SIZE = 4096
+
+
+def compress(filename, extension):
+    with open(filename, "rb") as infile:
+        data = infile.read()
+    if extension == ".gz":
+        data = gzip.compress(data)
+    elif extension == ".bz2":
+        data = bz2.compress(data)
+    else:
+        zstandard = pytest.importorskip("zstandard")
+        data = zstandard.ZstdCompressor().compress(data)
+    with open(filename + extension, "wb") as outfile:
+        outfile.write(data)
+    return filename + extension
+
+
+def line_id(line):
+    # every other line, so that None results are skipped too
+    if len(line) % 2:
+        return line[-20:]
+    return None
+
+
+@pytest.fixture(scope="module")
+def dump(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("dumps"))
+    comments_filename = generate(directory, 500)[1]
+    with open(comments_filename, "rb") as infile:
+        lines = list(infile)
+    return comments_filename, lines
+
+
+@pytest.fixture(params=["", ".gz", ".bz2", ".zst"])
+def filename(request, dump):
+    if not request.param:
+        return dump[0]
+    return compress(dump[0], request.param)
+
+
+def test_open_dump(filename, dump):
+    lines = dump[1]
+    with open_dump(filename) as infile:
+        assert list(infile) == lines
+    start = sum(map(len, lines[:100]))
+    with open_dump(filename, start) as infile:
+        assert list(infile) == lines[100:]
+
+
+def test_find_dump(tmp_path):
+    filename = str(tmp_path / "breastcancer_comments")
+    assert find_dump(filename) == filename
+    with open(filename + ".gz", "wb"):
+        pass
+    assert find_dump(filename) == filename + ".gz"
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_map_lines(filename, dump, workers):
+    lines = dump[1]
+    # many chunks, so lines are cut at their boundaries
+    assert sum(map(len, lines)) > CHUNK_SIZE * 10
+    expected = [line_id(line) for line in lines if line_id(line) is not None]
+    progress = []
+    results = map_lines(filename, line_id, workers, chunk_size=CHUNK_SIZE, progress=lambda size, count: progress.append((size, count)))
+    assert list(results) == expected != []
+    assert sum(size for size, _ in progress) == sum(map(len, lines))
+    assert sum(count for _, count in progress) == len(lines)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_map_lines_part(filename, dump, workers):
+    lines = dump[1]
+    positions = [0]
+    for line in lines:
+        positions.append(positions[-1] + len(line))
+    start, end = positions[37], positions[401]
+    expected = [(position, line_id(line)) for position, line in zip(positions[37:401], lines[37:401]) if line_id(line) is not None]
+    results = map_lines(filename, line_id, workers, chunk_size=CHUNK_SIZE, start=start, end=end, offsets=True)
+    assert list(results) == expected
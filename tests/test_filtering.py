@@ -0,0 +1,50 @@
+import pytest
+
+from benchmarks.corpus import generate
+from redditscripts import filtering
+from redditscripts.output import WriterThread
+from redditscripts.parallel import can_fork
+from tests.test_checkpoints import read_output, run_filter
+from tests.test_store import break_dump
+
+
+class FailingWriterThread(WriterThread):
+    started = 0
+
+    def __init__(self):
+        FailingWriterThread.started += 1
+        super().__init__()
+
+    def close(self):
+        super().close()
+        raise RuntimeError("writer failed")
+
+
+@pytest.fixture
+def failing_writer(monkeypatch):
+    FailingWriterThread.started = 0
+    monkeypatch.setattr(filtering, "WriterThread", FailingWriterThread)
+
+
+@pytest.mark.skipif(not can_fork(), reason="workers need fork")
+def test_no_writer_thread_with_workers(tmp_path, failing_writer):
+    input_dir = str(tmp_path)
+    generate(input_dir, 300, hit_rate=0.3)
+    # the worker processes can't be forked from a process running the writer
+    run_filter(input_dir, str(tmp_path / "workers"), workers=2)
+    assert FailingWriterThread.started == 0
+    with pytest.raises(RuntimeError):
+        run_filter(input_dir, str(tmp_path / "writer"))
+    assert FailingWriterThread.started == 1
+    run_filter(input_dir, str(tmp_path / "writer"), background_writer=False)
+    assert read_output(str(tmp_path / "workers")) == read_output(str(tmp_path / "writer"))
+
+
+def test_writer_error_keeps_run_error(tmp_path, failing_writer):
+    input_dir = str(tmp_path)
+    comments_filename = generate(input_dir, 300, hit_rate=0.3)[1]
+    break_dump(comments_filename)
+    # the dump's error, not the writer's
+    with pytest.raises(ValueError):
+        run_filter(input_dir, str(tmp_path / "output"))
+    assert FailingWriterThread.started == 1
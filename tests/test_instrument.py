@@ -0,0 +1,30 @@
+from benchmarks.corpus import generate
+from redditscripts.instrument import RunReport
+from tests.test_checkpoints import run_filter
+
+
+def test_match_rate():
+    report = RunReport("test")
+    with report.phase("lines", filters=True) as phase:
+        phase.advance(100, 10)
+        for _ in phase.count(range(4)):
+            pass
+    with report.phase("none kept", filters=True) as phase:
+        phase.advance(100, 10)
+    with report.phase("write"):
+        pass
+    assert report.phases["lines"].summary()["match_rate"] == 0.4
+    assert report.phases["none kept"].summary()["match_rate"] == 0.0
+    assert report.phases["write"].summary()["match_rate"] is None
+
+
+def test_nothing_matched(tmp_path, capsys):
+    input_dir = str(tmp_path)
+    generate(input_dir, 300)
+    report = RunReport("filter")
+    run_filter(input_dir, str(tmp_path / "output"), [" no such keyword "], report=report)
+    summary = report.finish(str(tmp_path / "output"))["phases"]
+    assert summary["submissions"]["lines"] > 0
+    assert summary["submissions"]["match_rate"] == 0.0
+    assert summary["comments"]["match_rate"] == 0.0
+    assert "0 kept" in capsys.readouterr().err
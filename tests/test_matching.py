@@ -0,0 +1,89 @@
+import json
+import random
+import re
+
+import pytest
+
+from redditscripts.filtering import cleanup_pattern
+from redditscripts.matching import KeywordMatcher, RawPrefilter
+
+# prefixes of each other, overlapping, and sharing words
+KEYWORDS = [" go flat", " go flat ", " going flat ", " stay flat", " staying flat ", " flat", " flat closure ",
+            " explant", " post-explant ", " remove the implant", " removed the implant", " i m flat ", " am flat "]
+
+WORDS = ["go", "going", "stay", "staying", "flat", "flatties", "closure", "explant", "post", "remove", "removed",
+         "the", "implant", "implants", "i", "m", "am", "a", "x"]
+
+
+def random_text(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(0, 12))]
+    return " " + " ".join(words) + " "
+
+
+def test_matches():
+    rng = random.Random(0)
+    matcher = KeywordMatcher(KEYWORDS)
+    matched = 0
+    for _ in range(5000):
+        title, selftext = random_text(rng), random_text(rng)
+        expected = [keyword for keyword in KEYWORDS if keyword in title or keyword in selftext]
+        assert matcher.matches(title, selftext) == expected
+        assert matcher.search(title, selftext) == bool(expected)
+        matched += bool(expected)
+    assert 0 < matched < 5000
+
+
+def test_no_match_across_fields():
+    matcher = KeywordMatcher([" go flat "])
+    assert matcher.matches(" i will go ", " flat out ") == []
+    assert matcher.matches(" i will go flat ", " ") == [" go flat "]
+
+
+def test_duplicates_and_empty_keywords():
+    matcher = KeywordMatcher([" flat", "", " flat", " go"])
+    assert matcher.keywords == [" flat", " go"]
+    assert matcher.matches(" go flat ") == [" flat", " go"]
+    assert KeywordMatcher([]).matches(" go flat ") == []
+
+
+def test_same_as_regex_per_keyword():
+    # keywords with regex metacharacters are matched literally
+    keywords = [" a.b", " (x)", " c+", " d|e"]
+    matcher = KeywordMatcher(keywords)
+    for text in [" a.b ", " axb ", " (x) ", " x ", " c+ ", " cc ", " d|e ", " d "]:
+        assert matcher.matches(text) == [keyword for keyword in keywords if re.search(re.escape(keyword), text)]
+
+
+def raw_text(rng):
+    # words in any case, between punctuation, underscores, escapes and
+    # non-ASCII letters, as they are in the dumps
+    separators = [" ", "  ", "-", "_", ".\n", "\"", "'", "é", "\U0001f600", "/", "\t"]
+    words = [rng.choice(WORDS) for _ in range(rng.randint(0, 12))]
+    words = [word.upper() if rng.random() < 0.2 else word.title() if rng.random() < 0.2 else word for word in words]
+    return "".join(word + rng.choice(separators) for word in words)
+
+
+@pytest.mark.parametrize("keywords", [KEYWORDS[:5], KEYWORDS + [" %s flat " % word for word in WORDS]])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_prefilter_never_drops_a_match(keywords, ensure_ascii):
+    rng = random.Random(1)
+    matcher = KeywordMatcher(keywords)
+    prefilter = RawPrefilter(keywords)
+    assert prefilter.tokens is not None or prefilter.pattern is not None
+    matched = dropped = 0
+    for _ in range(5000):
+        record = {"title": raw_text(rng), "selftext": raw_text(rng), "author": rng.choice(WORDS)}
+        line = (json.dumps(record, ensure_ascii=ensure_ascii) + "\n").encode("UTF-8")
+        title = " " + cleanup_pattern.sub(" ", record["title"].lower()) + " "
+        selftext = " " + cleanup_pattern.sub(" ", record["selftext"].lower()) + " "
+        if matcher.search(title, selftext):
+            matched += 1
+            assert prefilter.may_match(line)
+        elif not prefilter.may_match(line):
+            dropped += 1
+    assert matched and dropped
+
+
+def test_prefilter_non_ascii_keyword():
+    prefilter = RawPrefilter([" go flat", " été "])
+    assert prefilter.may_match(b'{"title": "nothing here"}')
@@ -0,0 +1,62 @@
+import random
+from collections import Counter
+
+import pytest
+
+from redditscripts.ngrams import NgramCounter, SpaceSaving, Vocabulary
+
+
+def zipf_words(rng, count, vocabulary_size=300):
+    weights = [1 / rank for rank in range(1, vocabulary_size + 1)]
+    return rng.choices(["w%d" % rank for rank in range(vocabulary_size)], weights, k=count)
+
+
+def documents(seed=0):
+    rng = random.Random(seed)
+    return [zipf_words(rng, rng.randint(0, 40)) for _ in range(300)]
+
+
+@pytest.mark.parametrize("n", [1, 2, 3])
+def test_exact_counts(n):
+    counter = NgramCounter(Vocabulary())
+    words = []
+    for document in documents():
+        counter.add(document)
+        words.extend(document)
+    # one sequence, across documents, ties in first-seen order
+    expected = Counter(zip(*[words[position:] for position in range(n)]))
+    assert counter.most_common(n, 20) == expected.most_common(20)
+
+
+def test_exclude():
+    counter = NgramCounter(Vocabulary())
+    for document in documents():
+        counter.add(document)
+    top = counter.most_common(1, 5, exclude=["w0", "w2", "never seen"])
+    assert [words for words, _ in top] == [words for words, _ in counter.most_common(1, 7) if words not in [("w0",), ("w2",)]][:5]
+
+
+@pytest.mark.parametrize("capacity", [1, 10, 50])
+def test_space_saving(capacity):
+    keys = zipf_words(random.Random(capacity), 20000)
+    summary = SpaceSaving(capacity)
+    summary.update(keys)
+    counts = dict(summary.items())
+    actual = Counter(keys)
+    assert len(counts) <= capacity
+    assert sum(counts.values()) == len(keys)
+    for key, count in counts.items():
+        # an upper bound, off by at most the smallest count
+        assert actual[key] <= count <= actual[key] + min(counts.values())
+    for key, count in actual.items():
+        if count > len(keys) / capacity:
+            assert key in counts
+
+
+def test_sketch_large_enough_is_exact():
+    exact, sketch = NgramCounter(Vocabulary()), NgramCounter(Vocabulary(), sketch_size=100000)
+    for document in documents():
+        exact.add(document)
+        sketch.add(document)
+    for n in (1, 2, 3):
+        assert dict(sketch.most_common(n, 20)) == dict(exact.most_common(n, 20))
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from benchmarks.corpus import generate
+from redditscripts.store import CorpusStore, store_filename
+from tests.test_checkpoints import run_filter
+
+
+def break_dump(filename):
+    # a cut-off line half way through the dump
+    with open(filename, "rb") as infile:
+        lines = list(infile)
+    lines.insert(len(lines) // 2, b'{"id": "cut off\n')
+    with open(filename, "wb") as outfile:
+        outfile.writelines(lines)
+
+
+def contents(filename):
+    with CorpusStore(filename) as store:
+        return store.counts(), list(store.comments(["id"])), store.checkpoint()
+
+
+@pytest.mark.parametrize("settings", [{}, {"stream_comments": True}, {"incremental": True}])
+def test_failed_run_keeps_store(tmp_path, settings):
+    input_dir, output_dir = str(tmp_path), str(tmp_path / "output")
+    comments_filename = generate(input_dir, 300, hit_rate=0.3)[1]
+    run_filter(input_dir, output_dir, **settings)
+    filename = store_filename("breastcancer", output_dir)
+    before = contents(filename)
+    assert before[0][1] > 0
+    break_dump(comments_filename)
+    with pytest.raises(ValueError):
+        run_filter(input_dir, output_dir, **settings)
+    assert contents(filename) == before
+    assert not [name for name in os.listdir(output_dir) if name.endswith(".tmp")]
+
+
+def test_failed_first_run_leaves_no_store(tmp_path):
+    input_dir, output_dir = str(tmp_path), str(tmp_path / "output")
+    comments_filename = generate(input_dir, 300, hit_rate=0.3)[1]
+    break_dump(comments_filename)
+    with pytest.raises(ValueError):
+        run_filter(input_dir, output_dir)
+    assert not [name for name in os.listdir(output_dir) if ".sqlite" in name]
@@ -0,0 +1,52 @@
+import io
+import json
+import random
+
+import pytest
+
+from benchmarks.corpus import generate
+from redditscripts.streaming import ExternalSorter, JsonObjectWriter
+from tests.test_checkpoints import read_output, run_filter
+
+
+@pytest.mark.parametrize("count", [0, 1, 9, 10, 11, 1000])
+def test_external_sorter(count, tmp_path):
+    rng = random.Random(count)
+    keys = [(rng.randrange(50), number) for number in range(count)]
+    rng.shuffle(keys)
+    sorter = ExternalSorter(chunk_size=10, tmpdir=str(tmp_path))
+    for key in keys:
+        sorter.add(key, ("row", key))
+    assert len(sorter.chunks) == count // 10
+    assert list(sorter.sorted_rows()) == [("row", key) for key in sorted(keys)]
+
+
+@pytest.mark.parametrize("records", [{}, {"t1_a": {"body": "x"}}, {"t1_a": {"body": "é\""}, "t1_b": {"score": 3}}])
+def test_json_object_writer(records):
+    outfile = io.StringIO()
+    writer = JsonObjectWriter(outfile)
+    for key, value in records.items():
+        writer.write(key, value)
+    writer.close()
+    assert outfile.getvalue() == json.dumps(records)
+
+
+def test_stream_comments(tmp_path):
+    input_dir = str(tmp_path)
+    generate(input_dir, 600, hit_rate=0.3)
+    run_filter(input_dir, str(tmp_path / "streaming"), stream_comments=True)
+    run_filter(input_dir, str(tmp_path / "default"))
+    assert read_output(str(tmp_path / "streaming")) == read_output(str(tmp_path / "default"))
+
+
+def test_stream_comments_chronological(tmp_path):
+    input_dir = str(tmp_path)
+    generate(input_dir, 600, hit_rate=0.3)
+    run_filter(input_dir, str(tmp_path / "streaming"), stream_comments=True, group_comments_by_thread=False)
+    run_filter(input_dir, str(tmp_path / "default"))
+    streaming, default = read_output(str(tmp_path / "streaming")), read_output(str(tmp_path / "default"))
+    # the same comments, in the order of the dump rather than by thread
+    streaming_rows, default_rows = streaming.pop("breastcancer_comments.csv"), default.pop("breastcancer_comments.csv")
+    assert streaming == default
+    assert streaming_rows != default_rows
+    assert sorted(streaming_rows.splitlines()) == sorted(default_rows.splitlines())
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("nltk")
+
+LOAD = "from redditscripts.text import load_stopwords; print(' '.join(sorted(load_stopwords(['english'], %r))))"
+
+
+def make_corpus(directory, words):
+    os.makedirs(os.path.join(directory, "corpora", "stopwords"))
+    with open(os.path.join(directory, "corpora", "stopwords", "english"), "w", encoding="UTF-8") as outfile:
+        outfile.write("\n".join(words) + "\n")
+
+
+def load(tmp_path, *data_dirs):
+    # a fresh process, as nltk only looks for its corpora once
+    env = dict(os.environ, NLTK_DATA=os.pathsep.join(data_dirs), HOME=str(tmp_path))
+    command = [sys.executable, "-c", LOAD % str(tmp_path / "cache")]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run(command, env=env, cwd=root, capture_output=True, text=True, check=True).stdout.split()
+
+
+def test_stopwords_cache(tmp_path):
+    first, second, third = str(tmp_path / "first"), str(tmp_path / "second"), str(tmp_path / "third")
+    make_corpus(first, ["a", "the"])
+    assert load(tmp_path, first) == ["a", "the"]
+    assert os.listdir(str(tmp_path / "cache")) == ["stopwords-english.json"]
+    # from the cache
+    assert load(tmp_path, first) == ["a", "the"]
+    # nltk now looks somewhere else
+    make_corpus(second, ["an"])
+    assert load(tmp_path, second) == ["an"]
+    # a corpus added to a directory nltk looks in first
+    assert load(tmp_path, third, first) == ["a", "the"]
+    make_corpus(third, ["of"])
+    assert load(tmp_path, third, first) == ["of"]